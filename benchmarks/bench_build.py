@@ -0,0 +1,191 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+# Times each phase of a build on a synthetic corpus and records the results as JSON.
+# Run from the repository root:
+#   python benchmarks/bench_build.py --output new.json --compare old.json
+# exits with status 1 if any phase got slower than old.json by more than --threshold
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from corpus import create_corpus
+from mash.converter import create_page_converter
+from mash.util import (
+    add_folder_config_defaults,
+    create_tables_of_contents,
+    find_markdown,
+    load_config_file,
+    sort_toc,
+    supported_ext,
+)
+from mash.worker import read_page, write_page
+
+
+def time_build(infile, outfile):
+    """returns the seconds spent in each phase of a build"""
+    phases = {}
+
+    def timed(name, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        phases[name] = time.perf_counter() - start
+        return result
+
+    config = timed("load config", load_config_file, f"{infile}/config.json")
+    working_files = timed("find_markdown", find_markdown, infile)
+    toc = timed(
+        "create_tables_of_contents", create_tables_of_contents, config, working_files
+    )
+    add_folder_config_defaults(config, toc)
+    toc = timed("sort_toc", sort_toc, config, toc)
+    pages = [page for page in working_files if supported_ext(page[2])]
+    contents = timed(
+        "read",
+        lambda: [read_page(infile, dir, filename, ext) for dir, filename, ext in pages],
+    )
+    converter = timed("create_page_converter", create_page_converter, config, toc)
+    html = timed(
+        "render",
+        lambda: [
+            converter(filename, dir, ext, content)
+            for (dir, filename, ext), content in zip(pages, contents)
+        ],
+    )
+
+    def write():
+        for (dir, filename, _), page in zip(pages, html):
+            os.makedirs(os.path.join(outfile, dir), exist_ok=True)
+            write_page(outfile, dir, filename, page)
+
+    timed("write", write)
+    phases["total"] = sum(phases.values())
+    return phases
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def find_regressions(old, new, threshold, min_seconds=0.005):
+    """phases which got slower by more than threshold (and by more than noise)"""
+    return {
+        phase: (old["phases"][phase], seconds)
+        for phase, seconds in new["phases"].items()
+        if phase in old["phases"]
+        and seconds > old["phases"][phase] * (1 + threshold)
+        and seconds - old["phases"][phase] > min_seconds
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="benchmark the build pipeline")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--folders", type=int, default=10)
+    parser.add_argument(
+        "--embeddable", type=int, default=2, help="number of embeddable folders"
+    )
+    parser.add_argument(
+        "--nav-limit", type=int, default=-1, help="nav-limit of embeddable folders"
+    )
+    parser.add_argument("--links", type=int, default=5, help="wiki-links per page")
+    parser.add_argument("--words", type=int, default=300, help="words per page")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="runs per phase; the fastest is kept"
+    )
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="JSON results from an earlier run")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="allowed slowdown per phase (0.2 = 20%%)",
+    )
+    args = parser.parse_args(argv)
+
+    parameters = {
+        "pages": args.pages,
+        "folders": args.folders,
+        "embeddable": args.embeddable,
+        "nav-limit": args.nav_limit,
+        "links": args.links,
+        "words": args.words,
+        "seed": args.seed,
+    }
+    tmp_path = tempfile.mkdtemp()
+    try:
+        infile = create_corpus(
+            f"{tmp_path}/notes",
+            args.pages,
+            args.folders,
+            args.embeddable,
+            args.nav_limit,
+            args.links,
+            args.words,
+            args.seed,
+        )
+        runs = []
+        for _ in range(args.repeat):
+            shutil.rmtree(f"{tmp_path}/out", ignore_errors=True)
+            runs.append(time_build(infile, f"{tmp_path}/out"))
+    finally:
+        shutil.rmtree(tmp_path)
+
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "parameters": parameters,
+        "phases": {phase: min(run[phase] for run in runs) for phase in runs[0]},
+    }
+    for phase, seconds in results["phases"].items():
+        print(f"{phase:>26}: {seconds * 1000:10.2f} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        if old["parameters"] != parameters:
+            print("\033[93mWarning: comparing runs with different parameters\033[0m")
+        regressions = find_regressions(old, results, args.threshold)
+        for phase, (old_seconds, seconds) in regressions.items():
+            print(
+                f"\033[91m{phase} regressed: {old_seconds * 1000:.2f} ms -> {seconds * 1000:.2f} ms\033[0m"
+            )
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Compares the single-pass wiki-link rewriter against the old approach
+(which rebuilt the whole document once per link) on a document with 10k links.
+Run from the repository root: `python benchmarks/bench_local_links.py`
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mash.converter import rewrite_local_links
+
+
+def old_replace_local_links(content, rewrite):
+    for linked_pair in range(min(content.count("[["), content.count("]]"))):
+        start = content.index("[[")
+        end = content[start + 1 :].index("]]") + start + 1
+        label = content[start + 2 : end]
+        if "|" in label:
+            label, label_dest = label.split("|", 1)
+        else:
+            label_dest = label
+        content = f"{content[:start]}{rewrite(label, label_dest)}{content[end + 2:]}"
+    return content
+
+
+def create_document(links):
+    return "\n".join(
+        f"Line {i} of the session log mentions [[Session {i % 50}]] and [[someone|NPC {i % 7}]]."
+        for i in range(links // 2)
+    )
+
+
+def main(links=10000, repeat=3):
+    rewrite = lambda label, dest: f"[{label}](/Session%20Recaps/{dest}.html)"
+    content = create_document(links)
+    assert rewrite_local_links(content, rewrite) == old_replace_local_links(
+        content, rewrite
+    )
+    for name, function in (
+        ("single pass", rewrite_local_links),
+        ("old", old_replace_local_links),
+    ):
+        seconds = min(
+            timeit.repeat(lambda: function(content, rewrite), number=1, repeat=repeat)
+        )
+        print(f"{name:>12}: {seconds * 1000:10.2f} ms for {links} links")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import os
+import random
+
+words = (
+    "the party enters a dungeon where goblins guard an old muffin recipe "
+    "and the wizard casts a spell while the rogue searches for traps "
+    "behind a door made of stone with runes that glow in the dark"
+).split()
+
+
+def create_page(rng, title, siblings, words_per_page, links_per_page):
+    """a page with a heading, paragraphs, a list, a code block and some wiki-links"""
+    body = [rng.choice(words) for _ in range(words_per_page)]
+    for _ in range(links_per_page if siblings else 0):
+        target = rng.choice(siblings)
+        link = (
+            f"[[{target}]]"
+            if rng.random() < 0.5
+            else f"[[{rng.choice(words)}|{target}]]"
+        )
+        body.insert(rng.randrange(len(body) + 1), link)
+    paragraphs = [" ".join(body[i : i + 60]) for i in range(0, len(body), 60)]
+    return "\n\n".join(
+        [
+            f"## {title}",
+            *paragraphs,
+            "- *first* item\n- **second** item\n- ~~third~~ item",
+            "```\n[[not a link]]\n```",
+        ]
+    )
+
+
+def create_corpus(
+    path,
+    pages=1000,
+    folders=10,
+    embeddable=2,
+    nav_limit=-1,
+    links_per_page=5,
+    words_per_page=300,
+    seed=0,
+):
+    """write a notes directory with the given shape. the same arguments always create the same files"""
+    rng = random.Random(seed)
+    folder_names = [f"Folder {i}" for i in range(folders)]
+    config = {
+        "general": {"title": "Benchmark", "pretty-urls": False},
+        "folders": {
+            folder: {
+                "sort-mode": ("default", "final_number", "alphabetize")[i % 3],
+                "embeddable": i < embeddable,
+                "nav-limit": nav_limit if i < embeddable else -1,
+            }
+            for i, folder in enumerate(folder_names)
+        },
+    }
+    folder_pages = {folder: [] for folder in ["", *folder_names]}
+    folder_order = list(folder_pages)
+    for i in range(pages):
+        folder_pages[folder_order[i % len(folder_order)]].append(f"Page {i}")
+
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, "config.json"), "w") as f:
+        json.dump(config, f, indent=4)
+    with open(os.path.join(path, "robots.txt"), "w") as f:
+        f.write("User-agent: *\nDisallow: /\n")
+    for folder, titles in folder_pages.items():
+        os.makedirs(os.path.join(path, folder), exist_ok=True)
+        with open(os.path.join(path, folder, "index.md"), "w") as f:
+            f.write(f"Welcome to {folder or 'the benchmark'}")
+        for title in titles:
+            with open(os.path.join(path, folder, f"{title}.md"), "w") as f:
+                f.write(create_page(rng, title, titles, words_per_page, links_per_page))
+    return path
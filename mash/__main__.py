@@ -16,43 +16,193 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import os
 import shutil
+import sys
 import argparse
+import tracemalloc
 from .__init__ import __version__, __package__
-from .worker import work
+from .daemon import default_socket_path, run_client, serve
+from .manifest import load_manifest
+from .sync import link_modes, sync_assets
+from .template import find_layout_error
+from .compress import compress_tree
+from .profiler import Profiler, null_profiler
+from .render_cache import RenderCache, default_render_cache_path
+from .staging import (
+    prune_generations,
+    publish,
+    resolve_output,
+    rollback,
+    stage_generation,
+)
 from .util import (
     get_theme_path,
     load_config_file,
 )
 
 
-def main(argv=None):
+def main(argv=None, sites=None):
+    """sites is given by a daemon running this build, to keep sites in memory between builds.
+    `mash batch sites.json` builds many sites, see batch.py"""
+
     def parse_args(argv):
         parser = argparse.ArgumentParser(
             prog=__package__, description="convert markdown files into html"
         )
+        parser.add_argument("--input", "-i", help="path to input (notes) directory")
+        parser.add_argument("--output", "-o", help="path to output directory")
+        parser.add_argument("--config", help="path to config.json", default="")
         parser.add_argument(
-            "--input", "-i", help="path to input (notes) directory", required=True
+            "--clean",
+            action="store_true",
+            help="delete target location before creating files",
+            default=False,
         )
         parser.add_argument(
-            "--output", "-o", help="path to output directory", required=True
+            "--incremental",
+            action="store_true",
+            help="update an existing target, only rebuilding pages whose source or navigation changed",
+            default=False,
         )
-        parser.add_argument("--config", help="path to config.json", default="")
         parser.add_argument(
-            "--clean",
+            "--jobs",
+            "-j",
+            type=int,
+            help="number of processes used to convert pages (0 = one per CPU core)",
+            default=1,
+        )
+        parser.add_argument(
+            "--read-jobs",
+            type=int,
+            help="number of threads reading notes (default: 4)",
+            default=4,
+        )
+        parser.add_argument(
+            "--write-jobs",
+            type=int,
+            help="number of threads writing pages while others are rendered (default: 4)",
+            default=4,
+        )
+        parser.add_argument(
+            "--link",
+            choices=link_modes,
+            help="how to put theme, img, js and include-dirs files into the output (default: copy)",
+            default="copy",
+        )
+        parser.add_argument(
+            "--checksum",
             action="store_true",
-            help="delete target location before creating files",
+            help="compare file contents instead of modification times to find changed files",
+            default=False,
+        )
+        parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="keep running after the build and rebuild whenever the notes change",
+            default=False,
+        )
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            help="write a pre-compressed .gz next to every html, css, js and svg file",
+            default=False,
+        )
+        parser.add_argument(
+            "--atomic",
+            action="store_true",
+            help="build into a new directory and then swap it in, keeping the output a symlink",
+            default=False,
+        )
+        parser.add_argument(
+            "--keep",
+            type=int,
+            help="number of previous generations kept by --atomic (default: 2)",
+            default=2,
+        )
+        parser.add_argument(
+            "--rollback",
+            action="store_true",
+            help="point an --atomic output back at its previous generation and exit",
+            default=False,
+        )
+        parser.add_argument(
+            "--profile",
+            nargs="?",
+            const="mash-trace.json",
+            metavar="TRACE",
+            help="time every stage of the build, print the slowest pages and write a Chrome trace (default: mash-trace.json)",
+        )
+        parser.add_argument(
+            "--render-cache",
+            metavar="PATH",
+            help=f"file to cache rendered markdown in between builds (default: {default_render_cache_path()})",
+            default=default_render_cache_path(),
+        )
+        parser.add_argument(
+            "--render-cache-size",
+            type=int,
+            metavar="MB",
+            help="evict the least recently used rendered markdown beyond this size (default: 256, 0 = no cache)",
+            default=256,
+        )
+        parser.add_argument(
+            "--daemon",
+            action="store_true",
+            help="keep running and build sites for other mash commands, which is faster for repeated --incremental builds",
+            default=False,
+        )
+        parser.add_argument(
+            "--socket",
+            metavar="PATH",
+            help=f"Unix socket of the daemon (default: {default_socket_path()})",
+            default=default_socket_path(),
+        )
+        parser.add_argument(
+            "--no-daemon",
+            action="store_true",
+            help="build in this process even if a daemon is running",
             default=False,
         )
         parser.add_argument(
             "--version", "-v", action="version", version=f"%(prog)s {__version__}"
         )
-        return parser.parse_args(argv)
+        args = parser.parse_args(argv)
+        if args.daemon:
+            return args
+        if args.input is None and not args.rollback:
+            parser.error("the following arguments are required: --input/-i")
+        if args.output is None:
+            parser.error("the following arguments are required: --output/-o")
+        return args
 
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["batch"]:
+        from .batch import batch
+
+        return batch(argv[1:])
     args = parse_args(argv)
+    if args.daemon:
+        return serve(args.socket, main)
+    if sites is None and not (args.no_daemon or args.watch):
+        status = run_client(argv, args.socket)
+        if status is not None:
+            return status
+
+    # imported here, so commands handled by a daemon don't spend time importing them
+    from .watch import Site, watch
+    from .worker import work
+
+    if args.rollback:
+        if not rollback(resolve_output(args.output)):
+            print("There is no previous generation to roll back to")
+            return 1
+        return 0
 
     # do error checking before touching any files
     infile = os.path.realpath(args.input)
     outfile = os.path.realpath(args.output)
+    if args.atomic:
+        # with --atomic the output itself is a symlink, which must not be resolved
+        outfile = resolve_output(args.output)
     config_path = (
         os.path.realpath(args.config)
         if args.config
@@ -61,8 +211,58 @@ def main(argv=None):
     if not os.path.exists(infile):
         print(f"{infile} not found")
         return 1
+    if args.jobs < 0:
+        print("--jobs must be 0 or a positive number")
+        return 1
+    jobs = args.jobs or os.cpu_count() or 1
+    if args.read_jobs < 1 or args.write_jobs < 1:
+        print("--read-jobs and --write-jobs must be positive numbers")
+        return 1
+    if args.atomic and args.watch:
+        print("--atomic can't be combined with --watch")
+        return 1
+    render_cache = None if args.render_cache_size == 0 else args.render_cache
 
-    config = load_config_file(config_path)
+    # a daemon keeps incremental builds in memory, and watches the notes to find
+    # out what changed before the next build of the same site
+    site_key = None
+    if sites is not None and (
+        args.incremental
+        and not (args.clean or args.atomic or args.watch or args.profile)
+    ):
+        site_key = (
+            infile,
+            outfile,
+            config_path,
+            jobs,
+            args.checksum,
+            args.link,
+            args.gzip,
+            render_cache,
+            args.read_jobs,
+            args.write_jobs,
+        )
+        if site_key in sites:
+            site = sites.pop(site_key)
+            errors = site.refresh()
+            if errors is not None:
+                sites[site_key] = site
+                if args.gzip:
+                    compress_tree(outfile, jobs)
+                return 1 if errors else 0
+            # another build changed the output, so the site in memory is out of date
+            site.stop_watching()
+
+    profiler = null_profiler
+    if args.profile:
+        profiler = Profiler()
+        tracemalloc.start()
+    with profiler.span("config load"):
+        try:
+            config = load_config_file(config_path)
+        except (OSError, ValueError) as e:
+            print(f"\033[91mCould not load {config_path}: {e}\033[0m")
+            return 1
 
     for include_dir in config["general"]["include-dirs"]:
         included_dir = f"{infile}/{include_dir}"
@@ -73,45 +273,106 @@ def main(argv=None):
     if theme_path is None:
         print("Invalid theme name")
         return 1
+    layout_error = find_layout_error(theme_path)
+    if layout_error is not None:
+        print(f"\033[91mInvalid theme layout {layout_error}\033[0m")
+        return 1
 
     # finished error checking!
-    # beyond here we always return 0
-
-    expected_file = {
-        "robots.txt": f"{infile}/robots.txt",
-        "/img": f"{infile}/img",
-        "/js": f"{infile}/js",
-    }
+    # beyond here we only return 1 if some pages failed to convert
 
     # DESTRUCTION (cleaning destination)
-    if os.path.exists(outfile):
+    previous_manifest = None
+    build_dir = outfile
+    if args.atomic:
+        # the live site is never touched; a new generation is built next to it
+        build_dir = stage_generation(outfile, seed=not args.clean)
         if not args.clean:
-            print("Target already exists. Re-run with --clean to overwrite")
+            previous_manifest = load_manifest(build_dir)
+    elif os.path.exists(outfile):
+        if args.incremental and not args.clean:
+            previous_manifest = load_manifest(outfile)
+        elif not args.clean:
+            print(
+                "Target already exists. Re-run with --clean to overwrite or --incremental to update"
+            )
             return 1
-        shutil.rmtree(outfile)
-
-    # CONSTRUCTION (copying directories)
-    os.makedirs(outfile)
-    # move theme
-    shutil.copytree(theme_path, f"{outfile}/theme")
-    shutil.move(f"{outfile}/theme/style.css", f"{outfile}/style.css")
-    # move robots.txt
-    if os.path.exists(expected_file["robots.txt"]):
-        shutil.copy(expected_file["robots.txt"], f"{outfile}/robots.txt")
-    else:
-        print(
-            f"\033[93mMissing `robots.txt` in {infile}; generating strict default\033[0m"
-        )
-        with open(f"{outfile}/robots.txt", "w") as fp:
-            fp.writelines(["User-agent: *\n", "Disallow: /\n"])
-    # optional directories
-    if os.path.exists(expected_file["/img"]):
-        shutil.copytree(expected_file["/img"], f"{outfile}/img")
-    if os.path.exists(expected_file["/js"]):
-        shutil.copytree(expected_file["/js"], f"{outfile}/js")
-    for include_dir in config["general"]["include-dirs"]:
-        shutil.copytree(f"{infile}/{include_dir}", f"{outfile}/{include_dir}")
+        else:
+            shutil.rmtree(outfile)
+
+    # CONSTRUCTION (syncing directories)
+    os.makedirs(build_dir, exist_ok=True)
+    with profiler.span("asset copy"):
+        assets = sync_assets(
+            config,
+            infile,
+            build_dir,
+            theme_path,
+            (previous_manifest or {}).get("assets", []),
+            args.checksum,
+            args.link,
+        )
 
     # Now convert the markdown files!
-    work(config, infile, outfile)
-    return 0
+    if render_cache is not None:
+        with profiler.span("render cache eviction"):
+            evict_render_cache = RenderCache(render_cache)
+            evict_render_cache.evict(args.render_cache_size * 2**20)
+            evict_render_cache.close()
+    if args.watch or site_key is not None:
+        site = Site(
+            config,
+            config_path,
+            infile,
+            outfile,
+            theme_path,
+            assets,
+            previous_manifest,
+            jobs,
+            args.checksum,
+            args.link,
+            args.gzip,
+            render_cache,
+            args.read_jobs,
+            args.write_jobs,
+        )
+        if args.watch:
+            return watch(site)
+        site.start_watching()
+        try:
+            errors = site.build()
+        except BaseException:
+            site.stop_watching()
+            raise
+        sites[site_key] = site
+    else:
+        errors = work(
+            config,
+            infile,
+            build_dir,
+            previous_manifest,
+            jobs,
+            assets,
+            profiler,
+            render_cache,
+            args.read_jobs,
+            args.write_jobs,
+        )
+    if args.gzip:
+        with profiler.span("gzip"):
+            compress_tree(build_dir, jobs)
+    if args.profile:
+        profiler.print_summary()
+        profiler.write_trace(args.profile)
+        tracemalloc.stop()
+        print(f"\033[92mwrote trace events to {args.profile}\033[0m")
+    if args.atomic:
+        if errors:
+            print(
+                "\033[91mNot publishing the new build because some pages failed to convert\033[0m"
+            )
+            shutil.rmtree(build_dir)
+            return 1
+        publish(outfile, build_dir)
+        prune_generations(outfile, args.keep)
+    return 1 if errors else 0
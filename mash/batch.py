@@ -0,0 +1,136 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stderr, redirect_stdout
+from .__main__ import main
+
+# `mash batch sites.json` builds many sites in one process tree. sites.json is a list of
+# {"input": ..., "output": ..., "config": ..., "args": [...]}, where paths are relative
+# to sites.json and "args" are any other mash arguments, like "--incremental".
+
+site_keys = ("input", "output", "config", "args")
+
+
+def load_sites(path):
+    """raises ValueError if the sites are invalid"""
+    with open(path) as f:
+        sites = json.load(f)
+    if not isinstance(sites, list) or not sites:
+        raise ValueError("expected a list of sites")
+    base = os.path.dirname(os.path.abspath(path))
+    argvs = []
+    for i, site in enumerate(sites):
+        if not isinstance(site, dict) or "input" not in site or "output" not in site:
+            raise ValueError(f"site {i} needs an input and an output")
+        unknown = [key for key in site if key not in site_keys]
+        if unknown:
+            raise ValueError(f"unknown key `{unknown[0]}` in site {i}")
+        argv = [
+            "--input",
+            os.path.join(base, site["input"]),
+            "--output",
+            os.path.join(base, site["output"]),
+            "--no-daemon",
+        ]
+        if site.get("config"):
+            argv.extend(["--config", os.path.join(base, site["config"])])
+        argv.extend(site.get("args", []))
+        argvs.append(argv)
+    return argvs
+
+
+def build_site(argv):
+    """build one site, returning its exit status, how long it took and its output"""
+    output = io.StringIO()
+    start = time.perf_counter()
+    with redirect_stdout(output), redirect_stderr(output):
+        try:
+            status = main(argv)
+        except SystemExit as e:
+            # argparse exits on bad arguments
+            status = e.code if isinstance(e.code, int) else 1
+        except Exception:
+            traceback.print_exc()
+            status = 1
+    return status, time.perf_counter() - start, output.getvalue()
+
+
+def pool_context():
+    """this process has no threads, so the pool can fork and share the modules imported here"""
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return None
+    return multiprocessing.get_context("fork")
+
+
+def print_batch_report(argvs, results, seconds):
+    failed = sum(1 for status, _, _ in results if status != 0)
+    print(
+        f"\033[{'91' if failed else '92'}mbatch: built {len(results) - failed} of {len(results)} sites in {seconds:.1f}s\033[0m"
+    )
+    for argv, (status, site_seconds, _) in zip(argvs, results):
+        print(
+            f"\033[{'91' if status else '92'}m{'failed' if status else 'ok':>8}{site_seconds:8.1f}s  {argv[1]} -> {argv[3]}\033[0m"
+        )
+
+
+def batch(argv):
+    parser = argparse.ArgumentParser(
+        prog="mash batch", description="build every site listed in a json file"
+    )
+    parser.add_argument("sites", help="path to sites.json")
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        help="number of sites built at the same time (0 = one per CPU core)",
+        default=0,
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 0:
+        print("--jobs must be 0 or a positive number")
+        return 1
+    try:
+        argvs = load_sites(args.sites)
+    except (OSError, ValueError) as e:
+        print(f"\033[91mCould not load {args.sites}: {e}\033[0m")
+        return 1
+    # only imported to preload them: the pool forks after this, so no site imports
+    # them (or mistune) again. don't remove this as an unused import
+    from . import watch, worker  # noqa: F401
+
+    start = time.perf_counter()
+    results = [None] * len(argvs)
+    with ProcessPoolExecutor(
+        max_workers=min(args.jobs or os.cpu_count() or 1, len(argvs)),
+        mp_context=pool_context(),
+    ) as pool:
+        futures = {pool.submit(build_site, argv): i for i, argv in enumerate(argvs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            print(f"\033[92m== {argvs[i][1]} -> {argvs[i][3]}\033[0m")
+            sys.stdout.write(results[i][2])
+    print_batch_report(argvs, results, time.perf_counter() - start)
+    return 1 if any(status != 0 for status, _, _ in results) else 0
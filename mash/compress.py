@@ -0,0 +1,101 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import gzip
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from .util import write_file, write_if_changed
+
+# files which weren't worth compressing have no .gz to compare mtimes with, so the mtime
+# and size they had are recorded here instead, by their path relative to the output
+SKIPPED_FILENAME = ".mash-gzip-skipped.json"
+compressible_exts = (".html", ".css", ".js", ".svg")
+# a .gz sibling which isn't at least 10% smaller isn't worth serving
+min_ratio = 0.9
+
+
+def compress_file(path, skipped=None):
+    """write path.gz next to path. returns one of "compressed", "up to date" or "not worth it"
+    along with the number of bytes saved. skipped is the [mtime, size] the file had when it
+    was last found not worth compressing"""
+    gz_path = f"{path}.gz"
+    stat = os.stat(path)
+    if skipped == [stat.st_mtime_ns, stat.st_size]:
+        return "not worth it", 0
+    try:
+        # the .gz gets the mtime of its source, so any other mtime means it's stale
+        if os.stat(gz_path).st_mtime_ns == stat.st_mtime_ns:
+            return "up to date", 0
+    except FileNotFoundError:
+        pass
+    with open(path, "rb") as f:
+        data = f.read()
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(compressed) > len(data) * min_ratio:
+        if os.path.exists(gz_path):
+            os.remove(gz_path)
+        return "not worth it", 0
+    write_file(gz_path, compressed)
+    os.utime(gz_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    return "compressed", len(data) - len(compressed)
+
+
+def compress_tree(outfile, jobs=1):
+    """create .gz siblings for every text asset in outfile and delete .gz files whose source is gone.
+    zlib releases the GIL while compressing, so threads are enough to use every core"""
+    paths = []
+    for dir, _, files in os.walk(outfile):
+        for filename in files:
+            path = os.path.join(dir, filename)
+            if filename.endswith(".gz"):
+                if path[:-3].endswith(compressible_exts) and not os.path.exists(
+                    path[:-3]
+                ):
+                    os.remove(path)
+            elif os.path.splitext(filename)[1] in compressible_exts:
+                paths.append(path)
+    try:
+        with open(os.path.join(outfile, SKIPPED_FILENAME)) as f:
+            previous_skipped = json.load(f)
+    except (OSError, ValueError):
+        previous_skipped = {}
+    rel_paths = [os.path.relpath(path, outfile) for path in paths]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = list(
+            pool.map(
+                compress_file,
+                paths,
+                [previous_skipped.get(rel_path) for rel_path in rel_paths],
+            )
+        )
+    stats = {"compressed": 0, "up to date": 0, "not worth it": 0}
+    saved = 0
+    skipped = {}
+    for path, rel_path, (result, bytes_saved) in zip(paths, rel_paths, results):
+        stats[result] += 1
+        saved += bytes_saved
+        if result == "not worth it":
+            stat = os.stat(path)
+            skipped[rel_path] = [stat.st_mtime_ns, stat.st_size]
+    write_if_changed(
+        os.path.join(outfile, SKIPPED_FILENAME),
+        json.dumps(skipped, indent=1, sort_keys=True),
+    )
+    print(
+        f"\033[92mgzip: compressed {stats['compressed']} files saving {saved} bytes, {stats['up to date']} already up to date, {stats['not worth it']} not worth compressing\033[0m"
+    )
+    return stats
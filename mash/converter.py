@@ -14,54 +14,152 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import re
+import mistune
 from mistune import create_markdown
-from .util import get_route_name
+from .links import resolve_link
+from .manifest import hash_json
+from .minify import minify_html
+from .nav import create_nav_placeholder
+from .profiler import null_profiler
+from .template import load_template
+from .util import (
+    create_folder_index,
+    encode_string,
+    get_route_name,
+    get_theme_path,
+    page_url,
+    parent_folder,
+    SiteConfig,
+)
 
+# a fenced code block opener at the start of a line, a run of backticks, or a wiki-link
+local_link_token = re.compile(r"^ {0,3}(?P<fence>`{3,}|~{3,})|(?P<ticks>`+)|\[\[", re.M)
 
-def create_page_converter(config, toc):
-    convert_markdown_to_html = create_markdown(
-        escape=False, renderer="html", plugins=["strikethrough"]
-    )
 
-    header = f"""<!doctype html><html lang="en">
-    <head><title>{config['general']['title']}</title>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0"> 
-    <link rel="stylesheet" href="/style.css">
-    {'' if config['general']['favicon'] is None else f'<link rel="icon" type="image/svg+xml" href="{config['general']['favicon']}">'}
-    </head>
-    <body>
-    <div class="wrapper">
-    
-    <header>
-    <a href="/{'' if config['general']['pretty-urls'] else 'index.html'}">
-    {'' if config['general']['logo'] is None else f'<img src="{config['general']['logo']}" style="{config['general']['logo-style']}" alt="{config['general']['logo-alt']}">'}
-    <span id="header-title">{config['general']['title']}</span>
-    </a>
-    </header>
-    """
+def rewrite_local_links(content, rewrite):
+    """replace every [[label]] or [[label|dest]] with rewrite(label, dest) in a single pass,
+    leaving anything inside code spans and fenced code blocks untouched"""
+    out = []
+    pos = 0
+    closing_fences = {}
+    unclosed_ticks = set()
+    while (token := local_link_token.search(content, pos)) is not None:
+        if token["fence"]:
+            fence = token["fence"]
+            if fence not in closing_fences:
+                closing_fences[fence] = re.compile(
+                    rf"^ {{0,3}}{re.escape(fence[0])}{{{len(fence)},}}[ \t]*$", re.M
+                )
+            # skip the info string so it can't close the fence it opens
+            line_end = content.find("\n", token.end())
+            closing = (
+                None
+                if line_end == -1
+                else closing_fences[fence].search(content, line_end + 1)
+            )
+            end = len(content) if closing is None else closing.end()
+        elif token["ticks"]:
+            ticks = token["ticks"]
+            closing = None
+            if len(ticks) not in unclosed_ticks:
+                closing = re.compile(rf"(?<!`){ticks}(?!`)").search(
+                    content, token.end()
+                )
+                if closing is None:
+                    # no later run of this length can be closed either
+                    unclosed_ticks.add(len(ticks))
+            end = token.end() if closing is None else closing.end()
+        else:
+            end = content.find("]]", token.end())
+            if end == -1:
+                break
+            label = content[token.end() : end]
+            if "|" in label:
+                label, label_dest = label.split("|", 1)
+            else:
+                label_dest = label
+            out.append(content[pos : token.start()])
+            out.append(rewrite(label, label_dest))
+            pos = end + 2
+            continue
+        out.append(content[pos:end])
+        pos = end
+    out.append(content[pos:])
+    return "".join(out)
+
+
+def find_local_links(content):
+    """the destinations of every [[link]] outside of code, in order"""
+    dests = []
+
+    def collect(label, label_dest):
+        dests.append(label_dest)
+        return ""
+
+    rewrite_local_links(content, collect)
+    return dests
 
-    footer = f"""<footer>{config["general"]["footer"]}</footer>
-    </div>
-    </body>
-    </html>
+
+markdown_options = {"escape": False, "renderer": "html", "plugins": ["strikethrough"]}
+# rendered markdown can only be reused by the same version of mistune with the same options
+render_cache_salt = hash_json([mistune.__version__, markdown_options])
+
+
+def index_page_name(number):
+    """the filename of a page of a folder index, without .html"""
+    return "index" if number == 1 else f"index-{number}"
+
+
+def create_page_converter(
+    config, toc, profiler=null_profiler, links=None, render_cache=None
+):
+    """links is an optional dict with the "index" from links.create_page_index
+    and the "backlinks" from links.create_backlinks, so [[links]] can point to any folder.
+    render_cache is an optional render_cache.RenderCache salted with render_cache_salt
     """
-    content_start = """<article><div id='content'>"""
-    content_end = """</div></article>"""
+    convert_markdown_to_html = create_markdown(**markdown_options)
+    site = SiteConfig(config)
+
+    render_page = load_template(
+        get_theme_path(site.theme),
+        {
+            "title": site.title,
+            "favicon": (
+                ""
+                if site.favicon is None
+                else f'<link rel="icon" type="image/svg+xml" href="{site.favicon}">'
+            ),
+            "search-script": (
+                '<script src="/search-index/search.js" defer></script>'
+                if site.search
+                else ""
+            ),
+            "home": f"/{site.index_filename}",
+            "logo": (
+                ""
+                if site.logo is None
+                else f'<img src="{site.logo}" style="{site.logo_style}" alt="{site.logo_alt}">'
+            ),
+            "search-form": (
+                '<form id="search" role="search"><input type="search" name="q" placeholder="search" aria-label="search"></form><ul id="search-results"></ul>'
+                if site.search
+                else ""
+            ),
+            "footer": site.footer,
+        },
+        minify_html if site.minify else None,
+    )
     nav_start = """<nav>"""
     nav_end = """</nav>"""
-    get_route_name_ = lambda route: get_route_name(config, route).replace(" ", "&nbsp;")
-
-    def encode_string(title):
-        title = title.replace(" ", "%20")
-        title = title.replace("'", "%27")
-        return title
+    get_route_name_ = lambda route: site.nav_names.get(route) or get_route_name(
+        site, route
+    ).replace(" ", "&nbsp;")
 
     def create_url(dir, title):
-        sep = "/" if dir != "" else ""
-        return f"/{encode_string(dir)}{sep}{'' if config['general']['pretty-urls'] and title=="index" else encode_string(title)}{'' if config["general"]["pretty-urls"] else '.html'}"
+        return page_url(site, dir, title)
 
-    def create_html_table_of_contents(dir, include_index=True, limit=None):
+    def create_html_table_of_contents(dir, include_index=True, limit=None, offset=0):
         if limit is not None and limit < 1:
             raise NotImplementedError("limit must be positive integer")
         create_url_ = (
@@ -74,84 +172,210 @@ def create_page_converter(config, toc):
             [create_url_(filename) for filename in toc[dir] if filename != "index"]
         )
         if limit:
-            li = li[:limit]
+            li = li[offset : offset + limit]
         return "".join(li)
 
-    def add_links_to_folders(current_dir: str):
+    def create_folder_entries(dirname):
+        if site.folders[dirname].nav_limit == -1:
+            return create_html_table_of_contents(dirname)
+        return create_html_table_of_contents(
+            dirname,
+            include_index=True,
+            limit=site.folders[dirname].nav_limit,
+        )
+
+    def create_folder_link(dirname):
+        return f"<li><a href='/{encode_string(dirname)}/{site.index_filename}'>{get_route_name_(dirname)}</a></li>"
+
+    # every piece of a folder's navigation is rendered once and then reused by every nav
+    folder_index = create_folder_index(toc)
+    folder_entries_cache = {}
+    folder_link_cache = {}
+    folder_toc_cache = {}
+
+    def fragment(cache, dirname, create):
+        if dirname not in cache:
+            cache[dirname] = create(dirname)
+        return cache[dirname]
+
+    def add_links_to_folders(current_dir: str, parent=""):
         li = []
-        for dirname in toc.keys():
-            if dirname == "":
-                continue
+        for dirname in folder_index[parent]:
             if (
-                config["folders"][dirname]["embeddable"]
-                and config["folders"][dirname]["nav-limit"] != 0
+                site.folders[dirname].embeddable
+                and site.folders[dirname].nav_limit != 0
             ):
-                if config["folders"][dirname]["nav-limit"] == -1:
-                    li.append(create_html_table_of_contents(dirname))
-                else:
-                    li.append(
-                        create_html_table_of_contents(
-                            dirname,
-                            include_index=True,
-                            limit=config["folders"][dirname]["nav-limit"],
-                        )
-                    )
-            else:
                 li.append(
-                    f"<li><a href='/{encode_string(dirname)}/{'' if config['general']['pretty-urls'] else 'index.html'}'>{get_route_name_(dirname)}</a></li>"
+                    fragment(folder_entries_cache, dirname, create_folder_entries)
                 )
-                if dirname == current_dir:
-                    sub_toc = create_html_table_of_contents(dirname)
+                li.append(add_links_to_folders(current_dir, dirname))
+            else:
+                li.append(fragment(folder_link_cache, dirname, create_folder_link))
+                # expand the folders which lead to the current one
+                if current_dir == dirname or current_dir.startswith(f"{dirname}/"):
+                    sub_toc = fragment(
+                        folder_toc_cache, dirname, create_html_table_of_contents
+                    ) + add_links_to_folders(current_dir, dirname)
                     if sub_toc:
                         li.append(f"<li><ul>{sub_toc}</ul></li>")
         return "".join(li)
 
+    def create_link_url(dir, label_dest):
+        page = None if links is None else resolve_link(links["index"], dir, label_dest)
+        return create_url(dir, label_dest) if page is None else create_url(*page)
+
     def replace_local_links(dir, content):
-        for linked_pair in range(min(content.count("[["), content.count("]]"))):
-            start = content.index("[[")
-            end = content[start + 1 :].index("]]") + start + 1
-            label = content[start + 2 : end]
-            if "|" in label:
-                label, label_dest = label.split("|", 1)
-            else:
-                label_dest = label
-            content = f"{content[:start]}[{label}]({create_url(dir, label_dest)}){content[end + 2:]}"
-        return content
+        return rewrite_local_links(
+            content,
+            lambda label, label_dest: f"[{label}]({create_link_url(dir, label_dest)})",
+        )
+
+    def create_backlinks(dir, filename):
+        if links is None or not site.backlinks:
+            return ""
+        pages = links["backlinks"].get((dir, filename))
+        if not pages:
+            return ""
+        li = "".join(
+            f"<li><a href='{create_url(page_dir, page_filename)}'>{get_route_name_(page_dir if page_filename == 'index' else f'{page_dir}/{page_filename}')}</a></li>"
+            for page_dir, page_filename in pages
+        )
+        return f"<aside id='backlinks'><p>Linked from:</p><ul>{li}</ul></aside>"
+
+    # the nav only depends on the current directory, and the toc appended to
+    # an index page only depends on its folder, so each is rendered once
+    nav_cache = {}
+    index_toc_cache = {}
+    cache_stats = {
+        "hits": 0,
+        "misses": 0,
+        "render hits": 0,
+        "render misses": 0,
+        "minified bytes": 0,
+    }
+
+    def cached(cache, dir, create):
+        if dir in cache:
+            cache_stats["hits"] += 1
+        else:
+            cache_stats["misses"] += 1
+            cache[dir] = create(dir)
+        return cache[dir]
 
-    def converter(filename, dir, ext, contents):
+    def create_nav(current_dir):
+        return "".join(
+            [
+                nav_start,
+                "<ul>",
+                create_html_table_of_contents(""),
+                add_links_to_folders(current_dir),
+                "</ul>",
+                nav_end,
+            ]
+        )
+
+    def create_nav_reference(current_dir):
+        return create_nav_placeholder(config, current_dir)
+
+    def count_index_pages(dir):
+        """folders with a page-size split the toc of their index into several pages"""
+        page_size = site.folders[dir].page_size
+        entries = sum(1 for filename in toc[dir] if filename != "index")
+        if page_size == 0 or entries <= page_size:
+            return 1
+        return -(-entries // page_size)
+
+    def create_pager(dir, number, count):
+        prev_link = (
+            ""
+            if number == 1
+            else f"<a rel='prev' href='{create_url(dir, index_page_name(number - 1))}'>&lt; previous</a> "
+        )
+        next_link = (
+            ""
+            if number == count
+            else f" <a rel='next' href='{create_url(dir, index_page_name(number + 1))}'>next &gt;</a>"
+        )
+        return f"<p class='pager'>{prev_link}page {number} of {count}{next_link}</p>"
+
+    def create_index_toc(dir, number=1):
+        count = count_index_pages(dir)
+        if count == 1:
+            return create_html_table_of_contents(dir, include_index=False)
+        page_size = site.folders[dir].page_size
+        return create_html_table_of_contents(
+            dir, include_index=False, limit=page_size, offset=(number - 1) * page_size
+        ) + create_pager(dir, number, count)
+
+    def render_markdown(contents):
+        if render_cache is None:
+            return convert_markdown_to_html(contents)
+        key = render_cache.key(contents)
+        body = render_cache.get(key)
+        if body is None:
+            cache_stats["render misses"] += 1
+            body = convert_markdown_to_html(contents)
+            render_cache.put(key, body)
+        else:
+            cache_stats["render hits"] += 1
+        return body
+
+    def converter(filename, dir, ext, contents, number=1):
+        """number is the page of a paginated folder index, where the
+        pages after the first only contain their part of the toc"""
         h1 = (
             filename
-            if f"{dir}/{filename}" not in config["general"]["route-names"]
-            else config["general"]["route-names"][f"{dir}/{filename}"]
+            if f"{dir}/{filename}" not in site.route_names
+            else site.route_names[f"{dir}/{filename}"]
         )
         if not (dir == "" and filename == "index"):
             baseurl = f"{'' if dir == '' else '/'}{encode_string(dir)}"
-            if config["folders"][dir]["embeddable"] or filename == "index":
-                baseurl = ""
+            if site.folders[dir].embeddable or filename == "index":
+                # go back to the folder containing this one
+                parent = parent_folder(dir)
+                baseurl = f"{'' if parent == '' else '/'}{encode_string(parent)}"
                 if filename == "index":
-                    h1 = (
-                        dir
-                        if dir not in config["general"]["route-names"]
-                        else config["general"]["route-names"][dir]
-                    )
+                    h1 = get_route_name(site, dir)
             contents = (
-                f"[< click to go back]({baseurl}/{'' if config['general']['pretty-urls'] else 'index.html'})\n# {h1}\n"
+                f"[< click to go back]({baseurl}/{site.index_filename})\n# {h1}\n"
                 + contents
             )
-        contents = replace_local_links(dir, contents)
-        contents = [
-            header,
-            nav_start,
-            "<ul>",
-            create_html_table_of_contents(""),
-            add_links_to_folders(dir),
-            "</ul>",
-            nav_end,
-            content_start,
-            convert_markdown_to_html(contents),
-            f"{'' if dir=='' or filename != 'index' else create_html_table_of_contents(dir, include_index=False)}",
-        ]
-
-        return "".join([*contents, content_end, footer])
+        page = f"{dir}/{filename}{ext}"
+        with profiler.span("link rewrite", page):
+            contents = replace_local_links(dir, contents)
+        with profiler.span("nav assembly", page):
+            nav = cached(
+                nav_cache,
+                dir,
+                create_nav if site.nav_mode == "inline" else create_nav_reference,
+            )
+        with profiler.span("markdown render", page):
+            body = render_markdown(contents)
+        if site.minify:
+            # the nav, toc and backlinks are built without whitespace to begin with
+            with profiler.span("minify", page):
+                minified_body = minify_html(body)
+            cache_stats["minified bytes"] += (
+                render_page.saved + len(body) - len(minified_body)
+            )
+            body = minified_body
+        if dir == "" or filename != "index":
+            index_toc = ""
+        elif number == 1:
+            index_toc = cached(index_toc_cache, dir, create_index_toc)
+        else:
+            index_toc = create_index_toc(dir, number)
+        if index_toc:
+            # marked so that search can leave it out
+            index_toc = f"<div class='toc'>{index_toc}</div>"
+        return render_page(
+            nav=nav,
+            content=body,
+            toc=index_toc,
+            backlinks="" if number > 1 else create_backlinks(dir, filename),
+        )
 
+    converter.cache_stats = cache_stats
+    converter.create_nav = create_nav
+    converter.count_index_pages = count_index_pages
     return converter
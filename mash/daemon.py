@@ -0,0 +1,175 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import os
+import socket
+import stat
+import struct
+import sys
+import tempfile
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+
+# `mash --daemon` runs builds for other `mash` commands, which send it their arguments
+# over a Unix socket. Each request is a line of JSON, answered by lines of JSON with
+# the output of the build, followed by {"exit": status}.
+# This module is imported before anything else, so it must not import mistune.
+
+
+def default_socket_path():
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f"mash-{os.getuid()}", "daemon.sock")
+
+
+def find_socket_problem(socket_path):
+    """builds must not be sent to, or answered by, another user, so the socket must be in
+    a folder which only we own and can write to, and be ours too if it exists.
+    returns what's wrong, or None"""
+    dir = os.path.dirname(os.path.abspath(socket_path))
+    dir_stat = os.lstat(dir)
+    if not stat.S_ISDIR(dir_stat.st_mode) or dir_stat.st_uid != os.getuid():
+        return f"{dir} is not a folder owned by you"
+    if dir_stat.st_mode & 0o022:
+        return f"{dir} can be written to by other users"
+    try:
+        socket_stat = os.lstat(socket_path)
+    except FileNotFoundError:
+        return None
+    if not stat.S_ISSOCK(socket_stat.st_mode) or socket_stat.st_uid != os.getuid():
+        return f"{socket_path} is not a socket owned by you"
+    return None
+
+
+def peer_uid(conn):
+    """the uid of the process on the other end of a Unix socket,
+    or None where the platform can't tell"""
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    creds = conn.getsockopt(
+        socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+    )
+    _, uid, _ = struct.unpack("3i", creds)
+    return uid
+
+
+class SocketWriter:
+    """file-like object which sends everything written to it to the client"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def write(self, text):
+        if text:
+            self.conn.sendall(json.dumps({"output": text}).encode() + b"\n")
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def run_client(argv, socket_path):
+    """run a build in the daemon. returns its exit status, or None if no daemon is running"""
+    try:
+        problem = find_socket_problem(socket_path)
+    except FileNotFoundError:
+        return None
+    if problem is not None:
+        print(f"\033[93mnot using the daemon: {problem}\033[0m")
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+    except OSError:
+        client.close()
+        return None
+    if peer_uid(client) not in (None, os.getuid()):
+        client.close()
+        print(
+            f"\033[93mnot using the daemon: {socket_path} belongs to another user\033[0m"
+        )
+        return None
+    with client, client.makefile("rb") as replies:
+        client.sendall(json.dumps({"argv": argv, "cwd": os.getcwd()}).encode() + b"\n")
+        for line in replies:
+            reply = json.loads(line)
+            if "exit" in reply:
+                return reply["exit"]
+            sys.stdout.write(reply["output"])
+    print("\033[91mThe daemon stopped before the build finished\033[0m")
+    return 1
+
+
+def handle(conn, build, sites):
+    with conn.makefile("rb") as requests:
+        request = json.loads(requests.readline())
+    writer = SocketWriter(conn)
+    with redirect_stdout(writer), redirect_stderr(writer):
+        try:
+            os.chdir(request["cwd"])
+            status = build(request["argv"], sites)
+        except SystemExit as e:
+            # argparse exits on bad arguments and --help
+            status = e.code if isinstance(e.code, int) else 1
+        except Exception:
+            traceback.print_exc()
+            status = 1
+    conn.sendall(json.dumps({"exit": status}).encode() + b"\n")
+
+
+def serve(socket_path, build):
+    """answer requests one at a time with build(argv, sites), where sites
+    is kept between builds so they can reuse the work of earlier builds"""
+    os.makedirs(
+        os.path.dirname(os.path.abspath(socket_path)), mode=0o700, exist_ok=True
+    )
+    problem = find_socket_problem(socket_path)
+    if problem is not None:
+        print(f"\033[91mRefusing to listen on {socket_path}: {problem}\033[0m")
+        return 1
+    if os.path.exists(socket_path):
+        if run_client(["--version"], socket_path) is not None:
+            print(f"\033[91mA daemon is already listening on {socket_path}\033[0m")
+            return 1
+        # left behind by a daemon which didn't shut down cleanly
+        os.remove(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # only the owner may connect, whatever the umask
+    umask = os.umask(0o177)
+    try:
+        server.bind(socket_path)
+    finally:
+        os.umask(umask)
+    server.listen()
+    print(f"\033[92mlistening on {socket_path} (press Ctrl+C to stop)\033[0m")
+    sites = {}
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                if peer_uid(conn) not in (None, os.getuid()):
+                    continue
+                try:
+                    handle(conn, build, sites)
+                except OSError:
+                    # the client went away
+                    pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        os.remove(socket_path)
+    return 0
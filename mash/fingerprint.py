@@ -0,0 +1,118 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import os
+import posixpath
+import re
+from .manifest import hash_bytes, hash_file
+from .sync import sync_file
+from .util import write_file
+
+# With fingerprinting, every asset also gets a copy named after its contents (like
+# `img/muffin.3f2a9c01d4e5.svg`), which can be cached forever. The fingerprints map
+# the URL of every asset to the URL of its copy, and are used to rewrite references.
+
+ASSET_MANIFEST_FILENAME = "asset-manifest.json"
+fingerprinted_dirs = ("theme", "js", "img")
+
+css_url = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+html_url = re.compile(r"""\b(src|href)=(["'])(/[^"'?#]*)""")
+url_suffix = re.compile(r"[?#].*$")
+
+
+def fingerprinted_name(rel_path, digest):
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest[:12]}{ext}"
+
+
+def rewrite_css_urls(css, css_dir, fingerprints):
+    """point every url() in a stylesheet at the fingerprinted copy of the asset"""
+
+    def replace(match):
+        quote, url = match[1], match[2].strip()
+        if ":" in url:
+            # data: URIs and other sites
+            return match[0]
+        suffix = url_suffix.search(url)
+        suffix = "" if suffix is None else suffix[0]
+        path = posixpath.normpath(
+            posixpath.join("/", css_dir, url[: len(url) - len(suffix)])
+        )
+        if path not in fingerprints:
+            return match[0]
+        return f"url({quote}{fingerprints[path]}{suffix}{quote})"
+
+    return css_url.sub(replace, css)
+
+
+def rewrite_asset_urls(html, fingerprints):
+    """point every src and href starting with / at the fingerprinted copy of the asset,
+    with a single pass over the page and a lookup for each reference"""
+    return html_url.sub(
+        lambda match: f"{match[1]}={match[2]}{fingerprints.get(match[3], match[3])}",
+        html,
+    )
+
+
+def fingerprint_assets(outfile, assets, previous_fingerprints=None):
+    """copy the theme, style.css, js and img assets in outfile to fingerprinted names,
+    remove the copies which are no longer used, and write asset-manifest.json.
+    returns the fingerprints"""
+    fingerprinted = sorted(
+        rel_path
+        for rel_path in assets
+        if rel_path.split("/", 1)[0] in fingerprinted_dirs
+        and os.path.exists(os.path.join(outfile, rel_path))
+    )
+    fingerprints = {}
+    for rel_path in fingerprinted:
+        name = fingerprinted_name(rel_path, hash_file(os.path.join(outfile, rel_path)))
+        sync_file(
+            os.path.join(outfile, rel_path),
+            os.path.join(outfile, name),
+            link="hardlink",
+        )
+        fingerprints[f"/{rel_path}"] = f"/{name}"
+
+    # the stylesheet refers to other assets, so it is fingerprinted after rewriting them
+    if "style.css" in assets:
+        with open(os.path.join(outfile, "style.css")) as f:
+            css = rewrite_css_urls(f.read(), "", fingerprints)
+        name = fingerprinted_name("style.css", hash_bytes(css.encode()))
+        if not os.path.exists(os.path.join(outfile, name)):
+            write_file(os.path.join(outfile, name), css)
+        fingerprints["/style.css"] = f"/{name}"
+
+    for name in set((previous_fingerprints or {}).values()) - set(
+        fingerprints.values()
+    ):
+        if os.path.exists(os.path.join(outfile, name.lstrip("/"))):
+            os.remove(os.path.join(outfile, name.lstrip("/")))
+    write_file(
+        os.path.join(outfile, ASSET_MANIFEST_FILENAME),
+        json.dumps(fingerprints, indent=2, sort_keys=True),
+    )
+    return fingerprints
+
+
+def remove_fingerprints(outfile, previous_fingerprints):
+    """remove the fingerprinted copies of a build which had fingerprinting turned on"""
+    for name in (previous_fingerprints or {}).values():
+        if os.path.exists(os.path.join(outfile, name.lstrip("/"))):
+            os.remove(os.path.join(outfile, name.lstrip("/")))
+    if os.path.exists(os.path.join(outfile, ASSET_MANIFEST_FILENAME)):
+        os.remove(os.path.join(outfile, ASSET_MANIFEST_FILENAME))
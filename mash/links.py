@@ -0,0 +1,78 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from .util import supported_ext
+
+# Pages are identified by a (dir, filename) tuple. The page index maps every name
+# a [[link]] can use for a page to that tuple, so resolving a link is a dict lookup.
+
+
+def page_path(dir, filename):
+    return f"{dir}/{filename}" if dir else filename
+
+
+def create_page_index(config, working_files):
+    """map the path, title, route name and aliases of every page to the page.
+    a title shared by pages in different folders can only be linked to by its path"""
+    page_index = {}
+    titles = {}
+    for dir, filename, ext in working_files:
+        if not supported_ext(ext):
+            continue
+        page_index[page_path(dir, filename)] = (dir, filename)
+        if filename == "index" and dir:
+            page_index[dir] = (dir, filename)
+        titles.setdefault(filename, []).append((dir, filename))
+    for title, pages in titles.items():
+        if len(pages) == 1:
+            page_index.setdefault(title, pages[0])
+    names = {
+        **{name: route for route, name in config["general"]["route-names"].items()},
+        **config["general"]["aliases"],
+    }
+    for name, route in names.items():
+        # route names of pages in the root folder look like `/Example Page`
+        page = page_index.get(route.lstrip("/"))
+        if page is not None:
+            page_index.setdefault(name, page)
+    return page_index
+
+
+def resolve_link(page_index, dir, dest):
+    """find the page [[dest]] refers to from a page in dir, or None if there isn't one.
+    pages in the same folder win, then paths from the root, titles, route names and aliases
+    """
+    if dir:
+        page = page_index.get(f"{dir}/{dest}")
+        if page is not None:
+            return page
+    return page_index.get(dest.lstrip("/"))
+
+
+def create_backlinks(page_index, page_links):
+    """page_links maps each page to the destinations of its [[links]].
+    returns a dict of pages to the sorted pages linking to them, and a list of broken links
+    """
+    backlinks = {}
+    broken = []
+    for page, dests in page_links.items():
+        for dest in dests:
+            target = resolve_link(page_index, page[0], dest)
+            if target is None:
+                broken.append((page, dest))
+            elif target != page:
+                backlinks.setdefault(target, set()).add(page)
+    return {page: sorted(pages) for page, pages in backlinks.items()}, broken
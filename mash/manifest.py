@@ -0,0 +1,122 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import hashlib
+import json
+import os
+from .__init__ import __version__
+from .links import resolve_link
+from .util import get_theme_path, write_file
+
+MANIFEST_FILENAME = ".mash-manifest.json"
+
+
+def hash_bytes(data: bytes):
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_json(obj):
+    return hash_bytes(json.dumps(obj, sort_keys=True).encode())
+
+
+def hash_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def hash_tree(path):
+    """hash every file below path along with its relative name, so renames count as changes"""
+    h = hashlib.sha256()
+    for dir, dirs, files in os.walk(path):
+        dirs.sort()
+        for filename in sorted(files):
+            full_path = os.path.join(dir, filename)
+            h.update(os.path.relpath(full_path, path).encode())
+            h.update(hash_file(full_path).encode())
+    return h.hexdigest()
+
+
+def hash_nav(config, toc, dir):
+    """hash the parts of the toc which end up in the navigation of a page in `dir`.
+    that is every embeddable folder, plus `dir` and the folders containing it, which are expanded.
+    pages which only point to the nav of their folder don't depend on it at all
+    """
+    if config["general"]["nav-mode"] != "inline":
+        return None
+    return hash_json(
+        [
+            list(toc),
+            toc.get("", []),
+            {
+                folder: files
+                for folder, files in toc.items()
+                if config["folders"][folder]["embeddable"]
+                or dir == folder
+                or dir.startswith(f"{folder}/")
+            },
+        ]
+    )
+
+
+def hash_index_toc(toc, dir):
+    """hash the pages listed by the index of `dir`, which pages without an inline nav
+    don't otherwise depend on"""
+    return hash_json(toc.get(dir, []))
+
+
+def hash_links(links, dir, filename, dests):
+    """hash the pages a page links to and the pages linking to it"""
+    return hash_json(
+        [
+            [resolve_link(links["index"], dir, dest) for dest in dests],
+            links["backlinks"].get((dir, filename), []),
+        ]
+    )
+
+
+def create_manifest(config, toc):
+    theme_path = get_theme_path(config["general"]["theme"])
+    return {
+        "version": __version__,
+        "config": hash_json(config),
+        "theme": "" if theme_path is None else hash_tree(theme_path),
+        "toc": toc,
+        "pages": {},
+    }
+
+
+def manifests_compatible(old, new):
+    """pages from an old manifest can only be reused if nothing site-wide has changed"""
+    return all(
+        old.get(key) == new.get(key)
+        for key in ("version", "config", "theme", "fingerprints")
+    )
+
+
+def load_manifest(outfile):
+    try:
+        with open(os.path.join(outfile, MANIFEST_FILENAME), "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def save_manifest(outfile, manifest):
+    write_file(os.path.join(outfile, MANIFEST_FILENAME), json.dumps(manifest, indent=1))
@@ -0,0 +1,98 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import re
+from .util import write_file
+
+# Only HTML's own whitespace characters are collapsed (never a non-breaking space),
+# so the characters removed are all ASCII and the bytes saved are len(before) - len(after).
+
+whitespace = re.compile(r"[ \t\n\r\f]+")
+# elements whose contents are kept exactly, comments and tags, in that order of priority
+html_token = re.compile(
+    r"<(pre|code|textarea|script|style)\b.*?</\1\s*>|<!--.*?-->|<[^>]*>",
+    re.S | re.I,
+)
+# whitespace next to these doesn't show, so it can go entirely. comments are inline:
+# the whitespace around them may be all that separates two words
+block_tag = re.compile(
+    r"<(?:!doctype\b|/?(?:address|article|aside|blockquote|body|dd|details|div|dl|dt|figcaption"
+    r"|figure|footer|form|h[1-6]|head|header|hr|html|li|link|main|meta|nav|ol|p|pre"
+    r"|script|section|style|summary|table|tbody|td|tfoot|th|thead|title|tr|ul)\b)",
+    re.I,
+)
+css_token = re.compile(
+    r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/|\s*;(?:\s|/\*.*?\*/)*(?=\})"""
+    r"""|\s*([{};,>])\s*|(:)\s+|\s+""",
+    re.S,
+)
+
+
+def minify_html(html):
+    """collapse whitespace between words into a space, and drop it next to block elements.
+    the contents of pre, code, textarea, script and style elements are left alone"""
+    out = []
+    previous_tag = ""
+    pos = 0
+    for token in html_token.finditer(html):
+        text = whitespace.sub(" ", html[pos : token.start()])
+        if block_tag.match(previous_tag):
+            text = text.lstrip(" ")
+        if block_tag.match(token[0]):
+            text = text.rstrip(" ")
+        out.append(text)
+        out.append(token[0])
+        previous_tag = token[0]
+        pos = token.end()
+    text = whitespace.sub(" ", html[pos:])
+    out.append(text.lstrip(" ") if block_tag.match(previous_tag) else text)
+    return "".join(out)
+
+
+def minify_css(css):
+    """drop comments and the whitespace around punctuation, leaving strings alone"""
+
+    def replace(token):
+        if token[1] is not None:
+            return token[1]
+        if token[2] is not None:
+            return token[2]
+        if token[3] is not None:
+            return token[3]
+        if token[0].lstrip().startswith(";"):
+            # the last declaration of a block doesn't need its semicolon
+            return ""
+        # comments and whitespace between words, which may still separate them
+        return "" if token[0].startswith("/*") else " "
+
+    return css_token.sub(replace, css).strip()
+
+
+def minify_css_file(src, dst):
+    """write src minified to dst, unless dst already has those contents.
+    returns whether dst was written and the bytes saved"""
+    with open(src) as f:
+        css = f.read()
+    minified = minify_css(css)
+    saved = len(css.encode()) - len(minified.encode())
+    try:
+        with open(dst) as f:
+            if f.read() == minified:
+                return False, saved
+    except FileNotFoundError:
+        pass
+    write_file(dst, minified)
+    return True, saved
@@ -0,0 +1,74 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import shutil
+from .util import encode_string, write_if_changed
+
+# With "nav-mode" set to "script" or "include", the nav of each folder is written once
+# to nav-fragments/<folder>/nav.html and pages only point to the nav of their folder:
+# either with a placeholder filled in by nav.js, or with a server-side include.
+
+NAV_DIRNAME = "nav-fragments"
+FRAGMENT_FILENAME = "nav.html"
+nav_script = os.path.join(os.path.dirname(__file__), "static", "nav.js")
+
+
+def nav_fragment_path(dir):
+    return os.path.join(NAV_DIRNAME, dir, FRAGMENT_FILENAME)
+
+
+def nav_fragment_url(dir):
+    return f"/{encode_string(nav_fragment_path(dir))}"
+
+
+def create_nav_placeholder(config, dir):
+    """what a page in dir contains instead of its nav"""
+    url = nav_fragment_url(dir)
+    if config["general"]["nav-mode"] == "include":
+        return f'<!--#include virtual="{url}" -->'
+    return f"<nav data-src='{url}'><noscript><a href='{url}'>navigation</a></noscript></nav><script src='/{NAV_DIRNAME}/nav.js' defer></script>"
+
+
+def write_nav_fragments(outfile, toc, create_nav):
+    """write the nav of every folder in toc with create_nav(dir), leaving unchanged navs
+    alone, and remove the navs of folders which are gone. returns how many were written
+    """
+    fragments = {nav_fragment_path(dir) for dir in toc}
+    written = 0
+    for dir in toc:
+        path = os.path.join(outfile, nav_fragment_path(dir))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        written += write_if_changed(path, create_nav(dir))
+    with open(nav_script) as f:
+        write_if_changed(os.path.join(outfile, NAV_DIRNAME, "nav.js"), f.read())
+    for dir, _, files in os.walk(os.path.join(outfile, NAV_DIRNAME), topdown=False):
+        for filename in files:
+            path = os.path.join(dir, filename)
+            if (
+                filename == FRAGMENT_FILENAME
+                and os.path.relpath(path, outfile) not in fragments
+            ):
+                os.remove(path)
+        if not os.listdir(dir):
+            os.rmdir(dir)
+    return written
+
+
+def remove_nav_fragments(outfile):
+    path = os.path.join(outfile, NAV_DIRNAME)
+    if os.path.isdir(path):
+        shutil.rmtree(path)
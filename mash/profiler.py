@@ -0,0 +1,138 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+# stages recorded for every page, with their column names in the summary
+page_stages = {
+    "read": "read",
+    "link rewrite": "links",
+    "nav assembly": "nav",
+    "markdown render": "render",
+    "minify": "minify",
+    "write": "write",
+    "search index": "search",
+}
+
+
+class NullProfiler:
+    """does nothing, so code can always call profiler.span() without checking for --profile"""
+
+    enabled = False
+
+    def span(self, name, page=None):
+        return nullcontext()
+
+    def take_events(self):
+        return []
+
+    def add_events(self, events):
+        pass
+
+
+null_profiler = NullProfiler()
+
+
+class Profiler:
+    """records how long each stage of a build takes, for every page"""
+
+    enabled = True
+
+    def __init__(self):
+        self.events = []
+
+    @contextmanager
+    def span(self, name, page=None):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            # perf_counter is system-wide on Linux, so events from pool processes line up
+            self.events.append(
+                (
+                    name,
+                    page,
+                    start,
+                    time.perf_counter_ns() - start,
+                    os.getpid(),
+                    threading.get_ident(),
+                )
+            )
+
+    def take_events(self):
+        """remove and return the events recorded so far, to send them to another process"""
+        events, self.events = self.events, []
+        return events
+
+    def add_events(self, events):
+        self.events.extend(events)
+
+    def write_trace(self, path):
+        """write the events in Chrome's trace event format (load it in chrome://tracing or Perfetto)"""
+        origin = min((event[2] for event in self.events), default=0)
+        trace_events = [
+            {
+                "name": name,
+                "cat": "page" if page is not None else "build",
+                "ph": "X",
+                "ts": (start - origin) / 1000,
+                "dur": duration / 1000,
+                "pid": pid,
+                "tid": tid,
+                **({"args": {"page": page}} if page is not None else {}),
+            }
+            for name, page, start, duration, pid, tid in self.events
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+
+    def print_summary(self, top=10):
+        stages = {}
+        pages = {}
+        for name, page, _, duration, _, _ in self.events:
+            stages[name] = stages.get(name, 0) + duration
+            if page is not None:
+                pages.setdefault(page, {})
+                pages[page][name] = pages[page].get(name, 0) + duration
+        print("\033[92mtime spent in each stage:\033[0m")
+        for name, duration in sorted(stages.items(), key=lambda item: -item[1]):
+            print(f"{duration / 1e6:12.2f} ms  {name}")
+        print(f"\033[92m{min(top, len(pages))} slowest pages:\033[0m")
+        print(
+            "".join(f"{label:>10}" for label in ("ms total", *page_stages.values()))
+            + "  page"
+        )
+        slowest = sorted(pages.items(), key=lambda item: -sum(item[1].values()))
+        for page, durations in slowest[:top]:
+            print(
+                "".join(
+                    f"{value / 1e6:10.2f}"
+                    for value in (
+                        sum(durations.values()),
+                        *(durations.get(stage, 0) for stage in page_stages),
+                    )
+                )
+                + f"  {page}"
+            )
+        if tracemalloc.is_tracing():
+            print(
+                f"\033[92mpeak memory: {tracemalloc.get_traced_memory()[1] / 2**20:.1f} MiB (main process)\033[0m"
+            )
@@ -0,0 +1,115 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import sqlite3
+import time
+from .manifest import hash_bytes
+
+# The render cache maps a hash of the markdown given to mistune (after links were
+# rewritten) to the HTML it rendered. It lives outside of the output directory,
+# so it survives --clean, and a nav change only costs a lookup per page.
+
+
+def default_render_cache_path():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "mash", "render-cache.sqlite")
+
+
+class RenderCache:
+    """lookups are read straight from the database. new bodies and the use of old ones
+    are buffered and written by flush(), so each build only writes a few transactions"""
+
+    def __init__(self, path, salt=""):
+        """salt is mixed into every key, so a different markdown renderer gets different keys"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # the processes of a parallel build each have their own connection
+        self.db = sqlite3.connect(path, timeout=60)
+        # switching to WAL doesn't wait for the lock, so processes which open
+        # a new cache at the same time retry until one of them has set it up
+        for attempt in range(100):
+            try:
+                self.setup()
+                break
+            except sqlite3.OperationalError:
+                if attempt == 99:
+                    raise
+                time.sleep(0.05)
+        self.salt = salt
+        self.new_bodies = {}
+        self.used_keys = set()
+
+    def setup(self):
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS bodies"
+            " (key TEXT PRIMARY KEY, html TEXT NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS bodies_used ON bodies (used)")
+
+    def key(self, markdown):
+        return hash_bytes(f"{self.salt}\0{markdown}".encode())
+
+    def get(self, key):
+        if key in self.new_bodies:
+            return self.new_bodies[key]
+        row = self.db.execute(
+            "SELECT html FROM bodies WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        self.used_keys.add(key)
+        return row[0]
+
+    def put(self, key, html):
+        self.new_bodies[key] = html
+
+    def flush(self):
+        now = time.time()
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO bodies VALUES (?, ?, ?, ?)",
+                [
+                    (key, html, len(html.encode()), now)
+                    for key, html in self.new_bodies.items()
+                ],
+            )
+            self.db.executemany(
+                "UPDATE bodies SET used = ? WHERE key = ?",
+                [(now, key) for key in self.used_keys],
+            )
+        self.new_bodies = {}
+        self.used_keys = set()
+
+    def evict(self, max_bytes):
+        """delete the least recently used bodies until the cache is no larger than max_bytes.
+        returns how many were deleted"""
+        (total,) = self.db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM bodies"
+        ).fetchone()
+        evicted = []
+        for key, size in self.db.execute("SELECT key, size FROM bodies ORDER BY used"):
+            if total <= max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        with self.db:
+            self.db.executemany("DELETE FROM bodies WHERE key = ?", evicted)
+        return len(evicted)
+
+    def close(self):
+        self.flush()
+        self.db.close()
@@ -0,0 +1,182 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import html
+import json
+import os
+import re
+import shutil
+from .util import SiteConfig, get_route_name, page_url, write_file
+
+# The search index is an inverted index split into shards by the first letters of
+# each term, so the browser only downloads the shards for the words it searches for.
+# Each shard maps a term to a list of [page id, position, position, ...]
+
+SEARCH_DIRNAME = "search-index"
+prefix_length = 2
+stopwords = frozenset(
+    """a an and are as at be but by for from had has have he her his i if in into is it its
+    me my no not of on or our she so than that the their them then there these they this
+    to was we were what when which who will with you your""".split()
+)
+search_script = os.path.join(os.path.dirname(__file__), "static", "search.js")
+
+word = re.compile(r"\w+")
+tag = re.compile(r"<[^>]*>")
+back_link = re.compile(r'^<p><a href="[^"]*">&lt; click to go back</a></p>')
+# the toc of index pages and the backlinks list other pages, not what this page is about
+generated = re.compile(
+    r"<div class='toc'>.*?</div>|<aside id='backlinks'>.*?</aside>", re.DOTALL
+)
+
+
+def extract_text(page_html):
+    """the text inside a page's article, without the link back to its folder,
+    the toc of an index or the backlinks"""
+    start = page_html.find("<div id='content'>")
+    end = page_html.rfind("</div></article>")
+    if start == -1 or end == -1:
+        return ""
+    content = back_link.sub("", page_html[start + len("<div id='content'>") : end])
+    content = generated.sub(" ", content)
+    return html.unescape(tag.sub(" ", content))
+
+
+def tokenize(text):
+    """map every term which isn't a stopword to the positions of the words it appears at"""
+    terms = {}
+    for position, match in enumerate(word.finditer(text.lower())):
+        if match[0] not in stopwords:
+            terms.setdefault(match[0], []).append(position)
+    return terms
+
+
+def shard_name(term):
+    return term[:prefix_length]
+
+
+def remove_search_index(outfile):
+    path = os.path.join(outfile, SEARCH_DIRNAME)
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+
+
+class SearchIndex:
+    """adds rendered pages to the search index as they are written. postings are
+    spooled to disk per shard, and each changed shard is merged in finish(), so
+    only one shard is ever held in memory"""
+
+    def __init__(self, config, outfile, previous=None):
+        """previous is the "search" entry of a compatible manifest. without one the index starts over"""
+        self.site = SiteConfig(config)
+        self.path = os.path.join(outfile, SEARCH_DIRNAME)
+        self.spool_path = os.path.join(self.path, ".spool")
+        if previous is None:
+            remove_search_index(outfile)
+        # page -> [id, url, title, shards containing its terms]
+        self.pages = {} if previous is None else dict(previous["pages"])
+        self.next_id = max((entry[0] for entry in self.pages.values()), default=-1) + 1
+        self.stale_ids = set()
+        self.changed_shards = set()
+        self.changed = False
+        # postings left behind by an interrupted build belong to ids which may be reused
+        shutil.rmtree(self.spool_path, ignore_errors=True)
+        os.makedirs(self.spool_path)
+
+    def add_page(self, dir, filename, ext, page_html):
+        page = f"{dir}/{filename}{ext}"
+        self.remove_page(page)
+        shards = {}
+        for term, positions in tokenize(extract_text(page_html)).items():
+            shards.setdefault(shard_name(term), {})[term] = positions
+        for shard, terms in shards.items():
+            with open(os.path.join(self.spool_path, f"{shard}.jsonl"), "a") as f:
+                f.write(json.dumps([self.next_id, terms], separators=(",", ":")))
+                f.write("\n")
+        title = (
+            self.site.title
+            if dir == "" and filename == "index"
+            else get_route_name(
+                self.site, dir if filename == "index" else f"{dir}/{filename}"
+            )
+        )
+        self.pages[page] = [
+            self.next_id,
+            page_url(self.site, dir, filename),
+            title,
+            sorted(shards),
+        ]
+        self.changed_shards.update(shards)
+        self.changed = True
+        self.next_id += 1
+
+    def remove_page(self, page):
+        if page in self.pages:
+            id, _, _, shards = self.pages.pop(page)
+            self.stale_ids.add(id)
+            self.changed_shards.update(shards)
+            self.changed = True
+
+    def merge_shard(self, shard):
+        path = os.path.join(self.path, f"{shard}.json")
+        try:
+            with open(path) as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            index = {}
+        if self.stale_ids:
+            for term in list(index):
+                index[term] = [
+                    posting
+                    for posting in index[term]
+                    if posting[0] not in self.stale_ids
+                ]
+        spool_file = os.path.join(self.spool_path, f"{shard}.jsonl")
+        if os.path.exists(spool_file):
+            with open(spool_file) as f:
+                for line in f:
+                    id, terms = json.loads(line)
+                    if id in self.stale_ids:
+                        continue
+                    for term, positions in terms.items():
+                        index.setdefault(term, []).append([id, *positions])
+            os.remove(spool_file)
+        index = {term: postings for term, postings in index.items() if postings}
+        if index:
+            write_file(path, json.dumps(index, separators=(",", ":"), sort_keys=True))
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def finish(self):
+        """write the changed shards and the list of pages. returns the manifest entry"""
+        for shard in sorted(self.changed_shards):
+            self.merge_shard(shard)
+        os.rmdir(self.spool_path)
+        if self.changed or not os.path.exists(os.path.join(self.path, "index.json")):
+            meta = {
+                "prefix-length": prefix_length,
+                "stopwords": sorted(stopwords),
+                "pages": {
+                    id: [url, title] for id, url, title, _ in self.pages.values()
+                },
+            }
+            write_file(
+                os.path.join(self.path, "index.json"),
+                json.dumps(meta, separators=(",", ":")),
+            )
+            with open(search_script, "rb") as f:
+                write_file(os.path.join(self.path, "search.js"), f.read())
+        return {"pages": self.pages}
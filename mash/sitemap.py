@@ -0,0 +1,131 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+from .converter import index_page_name
+from .util import SiteConfig, page_url, write_if_changed
+
+SITEMAP_FILENAME = "sitemap.xml"
+# the most URLs a sitemap may list. bigger sites get a sitemap index pointing at several sitemaps
+max_urls = 50000
+
+
+def source_lastmod(infile, page):
+    """the modification time of a page's source, in the W3C format used by sitemaps"""
+    mtime = os.stat(os.path.join(infile, page.lstrip("/"))).st_mtime
+    return datetime.fromtimestamp(mtime, timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%S+00:00"
+    )
+
+
+def track_lastmod(infile, manifest, previous_manifest=None):
+    """record when the source of every page in the manifest last changed. pages keep the date
+    of the previous manifest unless their source hash changed, so touching a note doesn't count
+    """
+    previous_pages = (previous_manifest or {}).get("pages", {})
+    previous_lastmod = (previous_manifest or {}).get("lastmod", {})
+    manifest["lastmod"] = {
+        page: (
+            previous_lastmod[page]
+            if page in previous_lastmod
+            and previous_pages.get(page, {}).get("source") == entry["source"]
+            else source_lastmod(infile, page)
+        )
+        for page, entry in manifest["pages"].items()
+    }
+
+
+def create_urlset(entries):
+    urls = "".join(
+        f"<url><loc>{escape(loc)}</loc><lastmod>{lastmod}</lastmod></url>\n"
+        for loc, lastmod in entries
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n{urls}</urlset>\n'
+
+
+def create_sitemap_index(entries):
+    sitemaps = "".join(
+        f"<sitemap><loc>{escape(loc)}</loc><lastmod>{lastmod}</lastmod></sitemap>\n"
+        for loc, lastmod in entries
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n{sitemaps}</sitemapindex>\n'
+
+
+def write_sitemap(config, outfile, manifest):
+    """write sitemap.xml for the pages in the manifest, if the config has a site-url"""
+    site = SiteConfig(config)
+    if site.site_url is None:
+        remove_sitemap(outfile)
+        return
+    site_url = site.site_url.rstrip("/")
+    entries = []
+    for page in sorted(manifest["pages"]):
+        dir, filename = page.rsplit("/", 1)
+        entries.append(
+            (
+                f"{site_url}{page_url(site, dir, os.path.splitext(filename)[0])}",
+                manifest["lastmod"][page],
+            )
+        )
+        # the rest of a paginated folder index changes along with its first page
+        for number in range(2, manifest.get("index pages", {}).get(page, 1) + 1):
+            entries.append(
+                (
+                    f"{site_url}{page_url(site, dir, index_page_name(number))}",
+                    manifest["lastmod"][page],
+                )
+            )
+    shards = []
+    if len(entries) <= max_urls:
+        write_if_changed(
+            os.path.join(outfile, SITEMAP_FILENAME), create_urlset(entries)
+        )
+    else:
+        shards = [entries[i : i + max_urls] for i in range(0, len(entries), max_urls)]
+        for i, shard in enumerate(shards, 1):
+            write_if_changed(
+                os.path.join(outfile, f"sitemap-{i}.xml"), create_urlset(shard)
+            )
+        write_if_changed(
+            os.path.join(outfile, SITEMAP_FILENAME),
+            create_sitemap_index(
+                [
+                    (
+                        f"{site_url}/sitemap-{i}.xml",
+                        max(lastmod for _, lastmod in shard),
+                    )
+                    for i, shard in enumerate(shards, 1)
+                ]
+            ),
+        )
+    # remove the shards of a bigger sitemap from an earlier build
+    remove_sitemap_shards(outfile, len(shards) + 1)
+
+
+def remove_sitemap_shards(outfile, first=1):
+    i = first
+    while os.path.exists(os.path.join(outfile, f"sitemap-{i}.xml")):
+        os.remove(os.path.join(outfile, f"sitemap-{i}.xml"))
+        i += 1
+
+
+def remove_sitemap(outfile):
+    """remove the sitemap of a build which had a site-url"""
+    if os.path.exists(os.path.join(outfile, SITEMAP_FILENAME)):
+        os.remove(os.path.join(outfile, SITEMAP_FILENAME))
+    remove_sitemap_shards(outfile)
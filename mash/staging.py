@@ -0,0 +1,119 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import shutil
+from datetime import datetime
+
+# With --atomic, the output path is a symlink to one of the directories in
+# `{output}.generations`. Each build happens in a new generation, which is
+# published by atomically replacing the symlink.
+
+
+def resolve_output(output):
+    """resolve the folder containing the output, but not the output itself, which is
+    the symlink to replace"""
+    output = os.path.abspath(output)
+    return os.path.join(
+        os.path.realpath(os.path.dirname(output)), os.path.basename(output)
+    )
+
+
+def generations_path(outfile):
+    return f"{outfile}.generations"
+
+
+def list_generations(outfile):
+    """oldest first"""
+    try:
+        return sorted(
+            os.path.join(generations_path(outfile), name)
+            for name in os.listdir(generations_path(outfile))
+        )
+    except FileNotFoundError:
+        return []
+
+
+def current_generation(outfile):
+    if not os.path.islink(outfile):
+        return None
+    return os.path.realpath(outfile)
+
+
+def link_tree(src, dst):
+    """recreate src in dst with hardlinks, so unchanged files cost no time or disk"""
+    for dir, _, files in os.walk(src):
+        target_dir = os.path.join(dst, os.path.relpath(dir, src))
+        os.makedirs(target_dir, exist_ok=True)
+        for filename in files:
+            try:
+                os.link(os.path.join(dir, filename), os.path.join(target_dir, filename))
+            except OSError:
+                shutil.copy2(
+                    os.path.join(dir, filename), os.path.join(target_dir, filename)
+                )
+
+
+def publish(outfile, generation):
+    """point outfile at the generation. readers see either the old or the new site"""
+    swap_path = f"{outfile}.swap"
+    if os.path.lexists(swap_path):
+        os.remove(swap_path)
+    os.symlink(os.path.relpath(generation, os.path.dirname(outfile)), swap_path)
+    os.replace(swap_path, outfile)
+
+
+def stage_generation(outfile, seed=True):
+    """create a new generation to build into. if seed is true,
+    it starts out as a hardlinked copy of the current generation"""
+    os.makedirs(generations_path(outfile), exist_ok=True)
+    new_generation = lambda: os.path.join(
+        generations_path(outfile), datetime.now().strftime("%Y%m%dT%H%M%S%f")
+    )
+    if os.path.isdir(outfile) and not os.path.islink(outfile):
+        print(
+            f"\033[93mMoving {outfile} into {generations_path(outfile)} to build atomically from now on\033[0m"
+        )
+        generation = new_generation()
+        os.rename(outfile, generation)
+        publish(outfile, generation)
+    staging = new_generation()
+    current = current_generation(outfile)
+    if seed and current is not None:
+        link_tree(current, staging)
+    else:
+        os.makedirs(staging)
+    return staging
+
+
+def prune_generations(outfile, keep):
+    """delete all but the current generation and the `keep` newest generations before it"""
+    current = current_generation(outfile)
+    previous = [
+        generation for generation in list_generations(outfile) if generation != current
+    ]
+    for generation in previous[: max(0, len(previous) - keep)]:
+        shutil.rmtree(generation)
+
+
+def rollback(outfile):
+    """publish the generation before the current one. returns False if there is none"""
+    generations = list_generations(outfile)
+    current = current_generation(outfile)
+    if current not in generations or generations.index(current) == 0:
+        return False
+    publish(outfile, generations[generations.index(current) - 1])
+    return True
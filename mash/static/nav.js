@@ -0,0 +1,12 @@
+// replaces the placeholder nav written by muffin-mash with the nav of the page's folder
+(function () {
+    for (const nav of document.querySelectorAll("nav[data-src]")) {
+        fetch(nav.dataset.src)
+            .then((response) => (response.ok ? response.text() : null))
+            .then((html) => {
+                if (html !== null) {
+                    nav.outerHTML = html;
+                }
+            });
+    }
+})();
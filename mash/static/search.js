@@ -0,0 +1,70 @@
+// searches the index written by muffin-mash, downloading only the shards it needs
+(function () {
+    const root = "/search-index/";
+    const shards = {};
+    let meta = null;
+
+    const load = (path) =>
+        fetch(root + path).then((response) => (response.ok ? response.json() : {}));
+
+    function tokenize(query) {
+        return (query.toLowerCase().match(/[\p{L}\p{N}_]+/gu) || []).filter(
+            (term) => !meta.stopwords.includes(term)
+        );
+    }
+
+    async function postings(term) {
+        const shard = [...term].slice(0, meta["prefix-length"]).join("");
+        shards[shard] = shards[shard] || load(shard + ".json");
+        const pages = new Map();
+        for (const [id, ...positions] of (await shards[shard])[term] || []) {
+            pages.set(id, positions);
+        }
+        return pages;
+    }
+
+    async function search(query) {
+        meta = meta || (await load("index.json"));
+        const terms = tokenize(query);
+        if (terms.length === 0) {
+            return [];
+        }
+        const matches = await Promise.all(terms.map(postings));
+        const results = [];
+        for (const [id, positions] of matches[0]) {
+            if (!matches.every((pages) => pages.has(id))) {
+                continue;
+            }
+            // pages with the words next to each other, in order, come first
+            const phrases = positions.filter((start) =>
+                matches.every((pages, i) => pages.get(id).includes(start + i))
+            ).length;
+            const count = matches.reduce((sum, pages) => sum + pages.get(id).length, 0);
+            results.push([phrases, count, meta.pages[id]]);
+        }
+        results.sort((a, b) => b[0] - a[0] || b[1] - a[1]);
+        return results.map((result) => result[2]);
+    }
+
+    document.addEventListener("DOMContentLoaded", () => {
+        const form = document.getElementById("search");
+        const list = document.getElementById("search-results");
+        form.addEventListener("submit", async (event) => {
+            event.preventDefault();
+            const results = await search(form.elements.q.value);
+            list.replaceChildren(
+                ...results.map(([url, title]) => {
+                    const item = document.createElement("li");
+                    const link = document.createElement("a");
+                    link.href = url;
+                    link.textContent = title;
+                    item.append(link);
+                    return item;
+                })
+            );
+            if (results.length === 0) {
+                list.textContent = "no results";
+            }
+        });
+    });
+})();
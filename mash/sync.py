@@ -0,0 +1,177 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import errno
+import os
+import shutil
+import tempfile
+from .manifest import hash_file
+from .minify import minify_css_file
+from .template import LAYOUT_FILENAME
+from .util import write_file
+
+link_modes = ("copy", "hardlink", "reflink")
+
+
+def file_unchanged(src, dst, checksum=False):
+    try:
+        src_stat = os.stat(src)
+        dst_stat = os.stat(dst)
+    except FileNotFoundError:
+        return False
+    if (src_stat.st_dev, src_stat.st_ino) == (dst_stat.st_dev, dst_stat.st_ino):
+        return True
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if checksum:
+        return hash_file(src) == hash_file(dst)
+    return src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+
+
+def reflink_file(src, dst):
+    """let the kernel copy the data, which shares extents on filesystems that support it"""
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        remaining = os.fstat(fsrc.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+
+
+def sync_file(src, dst, checksum=False, link="copy"):
+    """copy src to dst unless it is already up to date. returns True if dst was written"""
+    if file_unchanged(src, dst, checksum):
+        return False
+    dst_dir = os.path.dirname(dst)
+    os.makedirs(dst_dir, exist_ok=True)
+    # never write into an existing dst: it may be a hardlink to a file we don't own
+    fd, tmp_path = tempfile.mkstemp(dir=dst_dir, prefix=".mash-")
+    os.close(fd)
+    try:
+        if link == "hardlink":
+            os.remove(tmp_path)
+            try:
+                os.link(src, tmp_path)
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                    raise
+                shutil.copy2(src, tmp_path)
+        elif link == "reflink" and hasattr(os, "copy_file_range"):
+            try:
+                reflink_file(src, tmp_path)
+            except OSError:
+                shutil.copyfile(src, tmp_path)
+            shutil.copystat(src, tmp_path)
+        else:
+            shutil.copy2(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+
+def sync_tree(src, dst, checksum=False, link="copy", exclude=()):
+    """make every file in src exist in dst, only writing files which changed.
+    returns (relative paths of every file in dst which came from src, number of files written)
+    """
+    synced = []
+    written = 0
+    for dir, dirs, files in os.walk(src):
+        dirs.sort()
+        for filename in sorted(files):
+            rel_path = os.path.relpath(os.path.join(dir, filename), src)
+            if rel_path in exclude:
+                continue
+            synced.append(rel_path)
+            if sync_file(
+                os.path.join(src, rel_path), os.path.join(dst, rel_path), checksum, link
+            ):
+                written += 1
+    return synced, written
+
+
+def remove_orphans(outfile, previous_assets, assets):
+    """delete files which an earlier sync created but whose source is gone.
+    only files recorded by a previous sync are touched, so generated pages are safe"""
+    removed = 0
+    for rel_path in set(previous_assets) - set(assets):
+        path = os.path.join(outfile, rel_path)
+        if os.path.isfile(path):
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def sync_assets(
+    config, infile, outfile, theme_path, previous_assets=(), checksum=False, link="copy"
+):
+    """put the theme, robots.txt, img, js and include-dirs into outfile,
+    only copying files which changed since the last build.
+    returns the relative paths of every asset in outfile"""
+    expected_file = {
+        "robots.txt": f"{infile}/robots.txt",
+        "/img": f"{infile}/img",
+        "/js": f"{infile}/js",
+    }
+    assets = []
+    copied = 0
+
+    def sync(src, dst, exclude=()):
+        nonlocal copied
+        synced, written = sync_tree(src, f"{outfile}/{dst}", checksum, link, exclude)
+        assets.extend(os.path.join(dst, rel_path) for rel_path in synced)
+        copied += written
+
+    # move theme, except for style.css which goes in the root and the layout which is
+    # only used to build pages
+    sync(theme_path, "theme", exclude={"style.css", LAYOUT_FILENAME})
+    if config["general"]["minify"]:
+        written, saved = minify_css_file(
+            f"{theme_path}/style.css", f"{outfile}/style.css"
+        )
+        copied += written
+        print(f"\033[92mminify: saved {saved} bytes of CSS\033[0m")
+    else:
+        copied += sync_file(
+            f"{theme_path}/style.css", f"{outfile}/style.css", checksum, link
+        )
+    assets.append("style.css")
+    # move robots.txt
+    assets.append("robots.txt")
+    if os.path.exists(expected_file["robots.txt"]):
+        copied += sync_file(
+            expected_file["robots.txt"], f"{outfile}/robots.txt", checksum, link
+        )
+    else:
+        print(
+            f"\033[93mMissing `robots.txt` in {infile}; generating strict default\033[0m"
+        )
+        write_file(f"{outfile}/robots.txt", "User-agent: *\nDisallow: /\n")
+    # optional directories
+    if os.path.exists(expected_file["/img"]):
+        sync(expected_file["/img"], "img")
+    if os.path.exists(expected_file["/js"]):
+        sync(expected_file["/js"], "js")
+    for include_dir in config["general"]["include-dirs"]:
+        sync(f"{infile}/{include_dir}", include_dir)
+    removed = remove_orphans(outfile, previous_assets, assets)
+    print(
+        f"\033[92mcopied {copied} files, {len(assets) - copied} already up to date, removed {removed} orphaned files\033[0m"
+    )
+    return assets
@@ -0,0 +1,108 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import functools
+import os
+import re
+
+# A layout is HTML with {{ slots }}. Site slots are the same on every page, so they
+# are filled in when the layout is compiled. Page slots are filled in for each page.
+
+LAYOUT_FILENAME = "layout.html"
+default_layout = os.path.join(os.path.dirname(__file__), "static", LAYOUT_FILENAME)
+site_slots = (
+    "title",
+    "favicon",
+    "search-script",
+    "home",
+    "logo",
+    "search-form",
+    "footer",
+)
+page_slots = ("nav", "content", "toc", "backlinks")
+
+slot = re.compile(r"\{\{\s*([\w-]+)\s*\}\}")
+
+
+def find_layout(theme_path):
+    """themes can replace the default layout with their own layout.html"""
+    if theme_path is not None and os.path.exists(
+        os.path.join(theme_path, LAYOUT_FILENAME)
+    ):
+        return os.path.join(theme_path, LAYOUT_FILENAME)
+    return default_layout
+
+
+def find_layout_error(theme_path):
+    """a layout is compiled wherever a converter is created, which can be in a render
+    process, so builds check it first. returns what's wrong with it, or None"""
+    path = find_layout(theme_path)
+    try:
+        with open(path) as f:
+            compile_template(f.read(), dict.fromkeys(site_slots, ""))
+    except (OSError, ValueError) as e:
+        return f"{path}: {e}"
+    return None
+
+
+def compile_template(source, site_slots, transform=None):
+    """split source into static text and page slots, with the site slots already filled in.
+    transform is applied to each piece of static text, like minify.minify_html.
+    returns a function taking the page slots as keyword arguments, whose
+    `saved` attribute is how many characters transform removed from every page"""
+    static = [""]
+    slots = []
+    for i, piece in enumerate(slot.split(source)):
+        if i % 2 == 0:
+            static[-1] += piece
+        elif piece in site_slots:
+            static[-1] += site_slots[piece]
+        elif piece in page_slots:
+            slots.append(piece)
+            static.append("")
+        else:
+            raise ValueError(f"unknown slot {{{{ {piece} }}}} in layout")
+    saved = 0
+    if transform is not None:
+        saved = sum(len(text) for text in static)
+        static = [transform(text) for text in static]
+        saved -= sum(len(text) for text in static)
+
+    def render(**page):
+        out = [static[0]]
+        for name, text in zip(slots, static[1:]):
+            out.append(page[name])
+            out.append(text)
+        return "".join(out)
+
+    render.saved = saved
+    return render
+
+
+@functools.lru_cache(maxsize=32)
+def load_layout(path, mtime_ns, site_slots, transform):
+    with open(path) as f:
+        return compile_template(f.read(), dict(site_slots), transform)
+
+
+def load_template(theme_path, site_slots, transform=None):
+    """compiled layouts are kept until the layout file changes, so the converters of
+    the same site in a process (like those of the daemon's rebuilds) reuse them.
+    the slots differ between sites, so different sites never share a layout"""
+    path = find_layout(theme_path)
+    return load_layout(
+        path, os.stat(path).st_mtime_ns, tuple(sorted(site_slots.items())), transform
+    )
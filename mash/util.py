@@ -30,15 +30,45 @@ default_config = {
         "pretty-urls": False,
         "route-names": {},
         "include-dirs": [],
+        "ignore-dirs": [],
+        "aliases": {},
+        "backlinks": False,
+        "search": False,
+        "site-url": None,
+        "fingerprint-assets": False,
+        "minify": False,
+        "nav-mode": "inline",
     },
     "folders": {},
 }
+default_folder_config = {
+    "sort-mode": "default",
+    "sort-reverse": False,
+    "embeddable": False,
+    "nav-limit": -1,
+    "page-size": 0,
+}
+sort_modes = ("default", "final_number", "alphabetize")
+nav_modes = ("inline", "script", "include")
+
+
+def get_route_name(site, route):
+    """site is a SiteConfig"""
+    if route in site.route_names:
+        return site.route_names[route]
+    return route if "/" not in route else route.rsplit("/", 1)[1]
 
 
-def get_route_name(config, route):
-    if route in config["general"]["route-names"]:
-        return config["general"]["route-names"][route]
-    return route if "/" not in route else route.split("/", 1)[1]
+def encode_string(title):
+    title = title.replace(" ", "%20")
+    title = title.replace("'", "%27")
+    return title
+
+
+def page_url(site, dir, title):
+    """site is a SiteConfig"""
+    sep = "/" if dir != "" else ""
+    return f"/{encode_string(dir)}{sep}{'' if site.pretty_urls and title=="index" else encode_string(title)}{site.url_suffix}"
 
 
 def get_theme_path(theme_name: str):
@@ -51,13 +81,74 @@ def get_theme_path(theme_name: str):
     return theme_module.__path__[0]
 
 
+def write_file(path, contents):
+    """write through a temporary file which is renamed into place, so readers never see
+    a half-written file and any hardlinks to the old file keep their contents"""
+    tmp_path = os.path.join(
+        os.path.dirname(path), f".{os.path.basename(path)}.{os.getpid()}.tmp"
+    )
+    try:
+        with open(tmp_path, "wb" if isinstance(contents, bytes) else "w") as f:
+            f.write(contents)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_if_changed(path, contents):
+    """leave the file alone if it's the same, so its mtime only changes with its contents
+    and browsers and crawlers see an unchanged file"""
+    try:
+        with open(path) as f:
+            if f.read() == contents:
+                return False
+    except FileNotFoundError:
+        pass
+    write_file(path, contents)
+    return True
+
+
 def supported_ext(ext: str):
     return ext in [".md", ".html"]
 
 
+def find_config_errors(config):
+    """unknown keys (like `general.titel`) and invalid values in a config loaded from json"""
+    errors = [f"unknown key `{key}`" for key in config if key not in default_config]
+    errors.extend(
+        f"unknown key `general.{key}`"
+        for key in config.get("general", {})
+        if key not in default_config["general"]
+    )
+    if config.get("general", {}).get("nav-mode", "inline") not in nav_modes:
+        errors.append(f"`general.nav-mode` must be one of {', '.join(nav_modes)}")
+    for folder, folder_config in config.get("folders", {}).items():
+        errors.extend(
+            f"unknown key `folders.{folder}.{key}`"
+            for key in folder_config
+            if key not in default_folder_config
+        )
+        if folder_config.get("sort-mode", "default") not in sort_modes:
+            errors.append(
+                f"`folders.{folder}.sort-mode` must be one of {', '.join(sort_modes)}"
+            )
+        page_size = folder_config.get("page-size", 0)
+        if type(page_size) is not int or page_size < 0:
+            errors.append(
+                f"`folders.{folder}.page-size` must be 0 or a positive number"
+            )
+    return errors
+
+
 def load_config_file(path):
+    """raises ValueError if the config has unknown keys or invalid values"""
     with open(path) as f:
         config = json.load(f)
+    errors = find_config_errors(config)
+    if errors:
+        raise ValueError(f"invalid config: {'; '.join(errors)}")
     for key in default_config:
         if key not in config:
             config[key] = default_config[key]
@@ -69,12 +160,6 @@ def load_config_file(path):
 
 def add_folder_config_defaults(config, toc):
     """idempotent function called immediately after discovering the folder structure to fix the config"""
-    default_folder_config = {
-        "sort-mode": "default",
-        "sort-reverse": False,
-        "embeddable": False,
-        "nav-limit": -1,
-    }
     for folder in toc:
         if folder not in config["folders"]:
             config["folders"][folder] = {}
@@ -83,13 +168,92 @@ def add_folder_config_defaults(config, toc):
                 config["folders"][folder][key] = default_val
 
 
+# The config is loaded as a dict, which is what gets hashed into the manifest and sent
+# to other processes. Code which runs for every page or link compiles it into a
+# SiteConfig first, so it reads attributes instead of nested dicts, and values which
+# every page needs are computed once. Keys become attributes like `site.pretty_urls`.
+
+
+def attribute_name(key):
+    return key.replace("-", "_")
+
+
+class Frozen:
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} can't be changed")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} can't be changed")
+
+
+class FolderConfig(Frozen):
+    __slots__ = tuple(attribute_name(key) for key in default_folder_config)
+
+    def __init__(self, folder):
+        for key, default in default_folder_config.items():
+            object.__setattr__(self, attribute_name(key), folder.get(key, default))
+
+
+class SiteConfig(Frozen):
+    __slots__ = (
+        *(attribute_name(key) for key in default_config["general"]),
+        "folders",
+        "url_suffix",
+        "index_filename",
+        "nav_names",
+    )
+
+    def __init__(self, config):
+        general = config["general"]
+        for key in default_config["general"]:
+            object.__setattr__(self, attribute_name(key), general[key])
+        object.__setattr__(
+            self,
+            "folders",
+            {
+                folder: FolderConfig(folder_config)
+                for folder, folder_config in config["folders"].items()
+            },
+        )
+        # what ends every URL of a page, and a folder's URL
+        object.__setattr__(self, "url_suffix", "" if self.pretty_urls else ".html")
+        object.__setattr__(
+            self, "index_filename", "" if self.pretty_urls else "index.html"
+        )
+        # route names as shown in the nav, where they shouldn't wrap
+        object.__setattr__(
+            self,
+            "nav_names",
+            {
+                route: name.replace(" ", "&nbsp;")
+                for route, name in self.route_names.items()
+            },
+        )
+
+
+def parent_folder(dir):
+    return dir.rsplit("/", 1)[0] if "/" in dir else ""
+
+
 def create_tables_of_contents(config, working_files):
+    """map the path of every folder (like `Fruits/Citrus`) to the pages in it.
+    folders which only contain other folders get an empty list, so nested folders have a parent
+    """
     working_files.sort()
     toc = {}
     for dir, filename, ext in working_files:
-        if not supported_ext(ext) or dir.startswith("."):
+        if not supported_ext(ext) or any(
+            part.startswith(".") for part in dir.split("/")
+        ):
             continue
         if dir not in toc:
+            ancestor = dir
+            while ancestor != "":
+                ancestor = parent_folder(ancestor)
+                if ancestor not in toc:
+                    toc[ancestor] = []
             toc[dir] = []
         if filename == "index" and (
             dir == ""
@@ -103,21 +267,41 @@ def create_tables_of_contents(config, working_files):
     return toc
 
 
-def find_markdown(infile):
-    """Starting with a directory entrypoint, look for index.md and all other md files"""
-    return sorted(
-        [
-            (
-                os.path.basename(dir) if dir != infile else "",
-                *os.path.splitext(filename),
-            )
-            for dir, _, files in os.walk(infile)
-            for filename in files
-        ]
-    )
+def find_markdown(infile, ignore=()):
+    """Starting with a directory entrypoint, look for index.md and all other md files.
+    Directories are given relative to infile (like `Fruits/Citrus`). Dotfile directories
+    and the relative paths in `ignore` are skipped without descending into them"""
+    found = []
+    unvisited = [""]
+    while unvisited:
+        dir = unvisited.pop()
+        with os.scandir(os.path.join(infile, dir)) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    path = f"{dir}/{entry.name}" if dir else entry.name
+                    if (
+                        not entry.is_symlink()
+                        and not entry.name.startswith(".")
+                        and path not in ignore
+                    ):
+                        unvisited.append(path)
+                else:
+                    found.append((dir, *os.path.splitext(entry.name)))
+    return sorted(found)
+
+
+def create_folder_index(toc):
+    """map every folder to the folders directly inside it, in toc order"""
+    children = {dir: [] for dir in toc}
+    for dir in toc:
+        if dir != "":
+            children[parent_folder(dir)].append(dir)
+    return children
 
 
 def sort_toc(config, toc):
+    site = SiteConfig(config)
+
     class SortFunction:
         """this is an ugly namespace I will change later"""
 
@@ -134,16 +318,14 @@ def sort_toc(config, toc):
 
         @staticmethod
         def alphabetize(files):
-            return sorted(files, key=lambda name: get_route_name(config, name).lower())
+            return sorted(files, key=lambda name: get_route_name(site, name).lower())
 
         @staticmethod
         def default(files):
             return files
 
     for folder in toc:
-        toc[folder] = SortFunction.__dict__[config["folders"][folder]["sort-mode"]](
-            toc[folder]
-        )
-        if config["folders"][folder]["sort-reverse"]:
+        toc[folder] = SortFunction.__dict__[site.folders[folder].sort_mode](toc[folder])
+        if site.folders[folder].sort_reverse:
             toc[folder].reverse()
     return toc
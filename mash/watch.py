@@ -0,0 +1,457 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from .compress import compress_tree
+from .converter import create_page_converter, find_local_links, render_cache_salt
+from .manifest import (
+    MANIFEST_FILENAME,
+    hash_bytes,
+    hash_index_toc,
+    hash_links,
+    hash_nav,
+    save_manifest,
+)
+from .render_cache import RenderCache
+from .search import SearchIndex
+from .sitemap import source_lastmod, write_sitemap
+from .sync import sync_assets
+from .template import find_layout, find_layout_error
+from .util import get_theme_path, load_config_file, supported_ext
+from .worker import (
+    build_pages,
+    discover,
+    print_error_report,
+    read_page,
+    write_page,
+)
+
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+
+
+def walk_visible(path):
+    """os.walk without descending into dotfile directories"""
+    for dir, dirs, files in os.walk(path):
+        dirs[:] = [dirname for dirname in dirs if not dirname.startswith(".")]
+        yield dir, files
+
+
+class InotifyWatcher:
+    """waits for changes using Linux's inotify. wait() returns None if events were lost"""
+
+    mask = (
+        IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    )
+
+    def __init__(self, paths):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+        for path in paths:
+            if os.path.isdir(path):
+                self.add_watches(path)
+            else:
+                self.add_watch(os.path.dirname(path))
+
+    def add_watch(self, dir):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dir), self.mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {dir}")
+        self.watches[wd] = dir
+
+    def add_watches(self, path):
+        for dir, _ in walk_visible(path):
+            self.add_watch(dir)
+
+    def read_events(self):
+        data = os.read(self.fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = struct.unpack_from("iIII", data, offset)
+            name = data[offset + 16 : offset + 16 + length].rstrip(b"\0")
+            offset += 16 + length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            path = os.path.join(self.watches.get(wd, ""), os.fsdecode(name))
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                if not os.path.basename(path).startswith("."):
+                    self.add_watches(path)
+            changed.add(path)
+        return changed
+
+    def poll(self):
+        """the changes since the last call, without waiting for any"""
+        changed = set()
+        while select.select([self.fd], [], [], 0)[0]:
+            more = self.read_events()
+            if more is None:
+                return None
+            changed |= more
+        return changed
+
+    def wait(self):
+        changed = self.read_events()
+        # editors save in several steps, so collect events until things settle down
+        while changed is not None and select.select([self.fd], [], [], 0.1)[0]:
+            more = self.read_events()
+            changed = None if more is None else changed | more
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """waits for changes by comparing the mtime and size of every file"""
+
+    def __init__(self, paths, interval=1.0):
+        self.paths = paths
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        for path in self.paths:
+            files = (
+                [
+                    os.path.join(dir, filename)
+                    for dir, files in walk_visible(path)
+                    for filename in files
+                ]
+                if os.path.isdir(path)
+                else [path]
+            )
+            for file in files:
+                try:
+                    stat = os.stat(file)
+                except OSError:
+                    continue
+                snapshot[file] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self):
+        snapshot = self.scan()
+        changed = {
+            path
+            for path in snapshot.keys() | self.snapshot.keys()
+            if snapshot.get(path) != self.snapshot.get(path)
+        }
+        self.snapshot = snapshot
+        return changed
+
+    def wait(self):
+        while True:
+            time.sleep(self.interval)
+            changed = self.poll()
+            if changed:
+                return changed
+
+    def close(self):
+        pass
+
+
+def create_watcher(paths):
+    try:
+        return InotifyWatcher(paths)
+    except (OSError, AttributeError, TypeError):
+        print("\033[93minotify is unavailable; polling for changes instead\033[0m")
+        return PollingWatcher(paths)
+
+
+class Site:
+    """keeps the config, discovered files, toc and converter of a build in memory,
+    so that editing a page only re-renders that page"""
+
+    def __init__(
+        self,
+        config,
+        config_path,
+        infile,
+        outfile,
+        theme_path,
+        assets,
+        previous_manifest=None,
+        jobs=1,
+        checksum=False,
+        link="copy",
+        gzip=False,
+        render_cache=None,
+        read_jobs=1,
+        write_jobs=1,
+    ):
+        self.config = config
+        self.config_path = config_path
+        self.infile = infile
+        self.outfile = outfile
+        self.theme_path = theme_path
+        self.assets = assets
+        self.jobs = jobs
+        self.checksum = checksum
+        self.link = link
+        self.gzip = gzip
+        self.render_cache = render_cache
+        self.read_jobs = read_jobs
+        self.write_jobs = write_jobs
+        # pages re-rendered by the watcher use this process's own connection to the cache
+        self.render_cache_db = (
+            None
+            if render_cache is None
+            else RenderCache(render_cache, render_cache_salt)
+        )
+        self.manifest = previous_manifest
+
+    def sync_assets(self):
+        self.assets = sync_assets(
+            self.config,
+            self.infile,
+            self.outfile,
+            self.theme_path,
+            self.assets,
+            self.checksum,
+            self.link,
+        )
+
+    def build(self):
+        """discover every file and rebuild the pages which changed. returns the errors"""
+        layout_error = find_layout_error(self.theme_path)
+        if layout_error is not None:
+            print(f"\033[91mInvalid theme layout {layout_error}\033[0m")
+            return {find_layout(self.theme_path): layout_error}
+        self.working_files, self.toc = discover(self.config, self.infile)
+        self.manifest, errors, self.links = build_pages(
+            self.config,
+            self.infile,
+            self.outfile,
+            self.working_files,
+            self.toc,
+            self.manifest,
+            self.jobs,
+            self.assets,
+            render_cache=self.render_cache,
+            read_jobs=self.read_jobs,
+            write_jobs=self.write_jobs,
+        )
+        self.known_files = set(self.working_files)
+        self.converter = create_page_converter(
+            self.config, self.toc, links=self.links, render_cache=self.render_cache_db
+        )
+        self.last_manifest_mtime = self.manifest_mtime()
+        return errors
+
+    def reload_config(self):
+        try:
+            config = load_config_file(self.config_path)
+        except (OSError, ValueError) as e:
+            print(f"\033[91mCould not reload {self.config_path}: {e}\033[0m")
+            return {self.config_path: str(e)}
+        theme_path = get_theme_path(config["general"]["theme"])
+        if theme_path is None:
+            print("\033[91mInvalid theme name; keeping the previous config\033[0m")
+            return {self.config_path: "invalid theme name"}
+        self.config = config
+        self.theme_path = theme_path
+        self.sync_assets()
+        return self.build()
+
+    def update(self, changed):
+        """rebuild whatever depends on the changed paths. None means anything could have changed.
+        returns the errors"""
+        if changed is None or self.config_path in changed:
+            return self.reload_config()
+        asset_dirs = ("img", "js", *self.config["general"]["include-dirs"])
+        assets_changed = False
+        structure_changed = False
+        edited = []
+        for path in sorted(changed):
+            rel_path = os.path.relpath(path, self.infile)
+            parts = rel_path.split(os.sep)
+            if (
+                rel_path.startswith("..")
+                or f"{path}{os.sep}".startswith(f"{self.outfile}{os.sep}")
+                or any(part.startswith(".") for part in parts)
+                or any(
+                    f"{rel_path}/".startswith(f"{ignored}/")
+                    for ignored in self.config["general"]["ignore-dirs"]
+                )
+            ):
+                continue
+            if parts[0] in asset_dirs or rel_path == "robots.txt":
+                assets_changed = True
+                continue
+            if os.path.isdir(path):
+                structure_changed = True
+                continue
+            filename, ext = os.path.splitext(parts[-1])
+            if not supported_ext(ext):
+                if not os.path.exists(path):
+                    # inotify reports a folder moved out of the notes as one event on
+                    # the folder itself, which can't be told apart from a file anymore
+                    structure_changed = True
+                continue
+            page = ("/".join(parts[:-1]), filename, ext)
+            if page in self.known_files and os.path.exists(path):
+                edited.append(page)
+            else:
+                structure_changed = True
+
+        if assets_changed:
+            self.sync_assets()
+        if structure_changed or (
+            assets_changed and self.config["general"]["fingerprint-assets"]
+        ):
+            # pages came or went, so the toc and therefore the navigation changed.
+            # or an asset has a new fingerprint, so references to it changed
+            return self.build()
+        return self.render(edited)
+
+    def render(self, edited):
+        """re-render edited pages with the converter that is already in memory"""
+        errors = {}
+        rendered = 0
+        search_index = None
+        if self.config["general"]["search"]:
+            search_index = SearchIndex(
+                self.config, self.outfile, self.manifest.get("search")
+            )
+        for dir, filename, ext in edited:
+            contents = read_page(self.infile, dir, filename, ext)
+            page = {
+                "source": hash_bytes(contents.encode()),
+                "nav": hash_nav(self.config, self.toc, dir),
+                "links": hash_links(
+                    self.links, dir, filename, find_local_links(contents)
+                ),
+            }
+            if filename == "index":
+                page["toc"] = hash_index_toc(self.toc, dir)
+            previous_page = self.manifest["pages"].get(f"{dir}/{filename}{ext}")
+            if previous_page == page:
+                continue
+            if previous_page is not None and previous_page["links"] != page["links"]:
+                # the backlinks of other pages may have changed too
+                if search_index is not None:
+                    self.manifest["search"] = search_index.finish()
+                return self.build()
+            try:
+                this_html = self.converter(filename, dir, ext, contents)
+            except Exception as e:
+                errors[f"{dir}/{filename}{ext}"] = f"{type(e).__name__}: {e}"
+                continue
+            outputs = self.manifest.setdefault("outputs", {})
+            outputs[f"{dir}/{filename}{ext}"], _ = write_page(
+                self.outfile,
+                dir,
+                filename,
+                this_html,
+                self.manifest.get("fingerprints"),
+                outputs.get(f"{dir}/{filename}{ext}"),
+            )
+            if search_index is not None:
+                search_index.add_page(dir, filename, ext, this_html)
+            self.manifest["pages"][f"{dir}/{filename}{ext}"] = page
+            if previous_page is None or previous_page["source"] != page["source"]:
+                self.manifest["lastmod"][f"{dir}/{filename}{ext}"] = source_lastmod(
+                    self.infile, f"{dir}/{filename}{ext}"
+                )
+            rendered += 1
+        print_error_report(errors)
+        if self.render_cache_db is not None:
+            self.render_cache_db.flush()
+        if search_index is not None:
+            self.manifest["search"] = search_index.finish()
+        if rendered:
+            print(f"\033[92mre-rendered {rendered} pages\033[0m")
+            write_sitemap(self.config, self.outfile, self.manifest)
+            save_manifest(self.outfile, self.manifest)
+        return errors
+
+    def watched_paths(self):
+        paths = [self.infile]
+        if os.path.relpath(self.config_path, self.infile).startswith(".."):
+            paths.append(self.config_path)
+        return paths
+
+    def manifest_mtime(self):
+        try:
+            return os.stat(os.path.join(self.outfile, MANIFEST_FILENAME)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def start_watching(self):
+        """for a daemon: remember the changes to the notes until the next refresh().
+        call it before build(), so that notes saved during the build aren't missed"""
+        self.watcher = create_watcher(self.watched_paths())
+
+    def refresh(self):
+        """rebuild whatever changed since the last refresh and return the errors.
+        returns None if another build wrote to the output, which makes this site stale
+        """
+        if self.manifest_mtime() != self.last_manifest_mtime:
+            return None
+        changed = self.watcher.poll()
+        if changed == set():
+            print("\033[92mnothing changed since the last build\033[0m")
+            return {}
+        errors = self.update(changed)
+        self.last_manifest_mtime = self.manifest_mtime()
+        return errors
+
+    def stop_watching(self):
+        self.watcher.close()
+
+
+def watch(site):
+    """build the site once, then keep rebuilding it whenever the notes change"""
+    # watch before building, so that notes saved during the first build aren't missed
+    watcher = create_watcher(site.watched_paths())
+    try:
+        site.build()
+        if site.gzip:
+            compress_tree(site.outfile, site.jobs)
+        print(
+            f"\033[92mwatching {site.infile} for changes (press Ctrl+C to stop)\033[0m"
+        )
+        while True:
+            changed = watcher.wait()
+            start = time.perf_counter()
+            site.update(changed)
+            if site.gzip:
+                compress_tree(site.outfile, site.jobs)
+            print(f"rebuilt in {(time.perf_counter() - start) * 1000:.0f} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+    return 0
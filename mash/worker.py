@@ -14,17 +14,42 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import multiprocessing
 import os
-import shutil
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pprint import pprint
 from .__init__ import __version__, __package__
-from .converter import create_page_converter
+from .converter import (
+    create_page_converter,
+    find_local_links,
+    index_page_name,
+    render_cache_salt,
+)
+from .fingerprint import fingerprint_assets, remove_fingerprints, rewrite_asset_urls
+from .links import create_backlinks, create_page_index
+from .nav import remove_nav_fragments, write_nav_fragments
+from .profiler import Profiler, null_profiler
+from .render_cache import RenderCache
+from .search import SearchIndex, remove_search_index
+from .sitemap import track_lastmod, write_sitemap
+from .manifest import (
+    create_manifest,
+    hash_bytes,
+    hash_index_toc,
+    hash_links,
+    hash_nav,
+    manifests_compatible,
+    save_manifest,
+)
 from .util import (
     find_markdown,
     create_tables_of_contents,
     add_folder_config_defaults,
     sort_toc,
     supported_ext,
+    write_file,
 )
 
 
@@ -33,15 +58,321 @@ def print_work_report(toc):
     pprint(toc, indent=4)
 
 
-def work(config, infile, outfile):
-    working_files = find_markdown(infile)
-    toc = create_tables_of_contents(config, working_files)
-    add_folder_config_defaults(config, toc)
-    toc = sort_toc(config, toc)
+def print_incremental_report(rendered, skipped):
+    print(
+        f"\033[92mrendered {rendered} pages, skipped {skipped} unchanged pages\033[0m"
+    )
+
+
+def print_write_report(written, unchanged, removed):
+    print(
+        f"\033[92mwrote {written} files, left {unchanged} identical files untouched, removed {removed} stale files\033[0m"
+    )
+
+
+def print_broken_links_report(broken_links):
+    for (dir, filename), dest in broken_links:
+        print(
+            f"\033[93mBroken link in {dir}/{filename}: [[{dest}]] doesn't match any page\033[0m"
+        )
+
+
+def print_error_report(errors):
+    for page, error in errors.items():
+        print(f"\033[91mFailed to convert {page}: {error}\033[0m")
+
+
+def print_cache_report(cache_stats):
+    for name, prefix in (("navigation", ""), ("render", "render ")):
+        hits = cache_stats.get(f"{prefix}hits", 0)
+        misses = cache_stats.get(f"{prefix}misses", 0)
+        if hits + misses == 0:
+            continue
+        print(
+            f"\033[92m{name} cache: {hits / (hits + misses):.0%} hit rate ({hits} hits, {misses} misses)\033[0m"
+        )
+
+
+def print_minify_report(cache_stats):
+    if cache_stats.get("minified bytes"):
+        print(
+            f"\033[92mminify: saved {cache_stats['minified bytes']} bytes of HTML\033[0m"
+        )
+
+
+# each process in the pool rebuilds its own converter from the (picklable) config and toc,
+# because the converter itself is a closure and can't be sent to another process
+_page_converter = None
+_profiler = null_profiler
+_render_cache = None
+
+
+def init_page_converter(config, toc, profile=False, links=None, render_cache=None):
+    """render_cache is the path of the render cache, which each process opens for itself"""
+    global _page_converter, _profiler, _render_cache
+    _profiler = Profiler() if profile else null_profiler
+    if _render_cache is not None:
+        _render_cache.close()
+    _render_cache = (
+        None if render_cache is None else RenderCache(render_cache, render_cache_salt)
+    )
+    _page_converter = create_page_converter(
+        config, toc, _profiler, links, _render_cache
+    )
+
+
+def convert_page(page):
+    """returns a tuple of (html, error message) so failures can be reported per file"""
+    filename, dir, ext, contents = page
+    try:
+        return _page_converter(filename, dir, ext, contents), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def convert_chunk(pages):
+    """convert a list of pages, returning the results, how the converter's caches were used
+    and the profiler events recorded while converting"""
+    stats_before = dict(_page_converter.cache_stats)
+    results = [convert_page(page) for page in pages]
+    if _render_cache is not None:
+        _render_cache.flush()
+    return (
+        results,
+        {
+            key: value - stats_before[key]
+            for key, value in _page_converter.cache_stats.items()
+        },
+        _profiler.take_events(),
+    )
+
+
+def convert_pages(
+    config,
+    toc,
+    pages,
+    jobs=1,
+    cache_stats=None,
+    profiler=null_profiler,
+    links=None,
+    render_cache=None,
+):
+    """convert a list of (filename, dir, ext, contents) and return the results in the same order.
+    if given, cache_stats is updated with the hits and misses of the converter's caches
+    """
+    return list(
+        iter_convert_pages(
+            config, toc, pages, jobs, cache_stats, profiler, links, render_cache
+        )
+    )
+
+
+def pool_context():
+    """the reader and writer threads make fork() unsafe, so processes are forked
+    from a server process without threads instead, where that's available"""
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return None
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+def iter_convert_pages(
+    config,
+    toc,
+    pages,
+    jobs=1,
+    cache_stats=None,
+    profiler=null_profiler,
+    links=None,
+    render_cache=None,
+    read=None,
+):
+    """like convert_pages, but yields each result as soon as its chunk is converted.
+    with read, pages are (filename, dir, ext) and read turns a chunk of them into
+    (filename, dir, ext, contents) just before the chunk is converted, so only the
+    sources of the chunks being converted are in memory"""
+
+    def read_chunks(chunksize):
+        for i in range(0, len(pages), chunksize):
+            chunk = pages[i : i + chunksize]
+            yield chunk if read is None else read(chunk)
+
+    if jobs == 1 or len(pages) < 2:
+        init_page_converter(config, toc, profiler.enabled, links, render_cache)
+        # small enough that writing starts early, big enough that flushing
+        # the render cache doesn't happen for every page
+        chunks = map(convert_chunk, read_chunks(64))
+        yield from collect_chunks(chunks, cache_stats, profiler)
+        return
+    chunksize = max(1, len(pages) // (jobs * 4))
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        mp_context=pool_context(),
+        initializer=init_page_converter,
+        initargs=(config, toc, profiler.enabled, links, render_cache),
+    ) as pool:
+
+        def chunks():
+            # pool.map would submit every chunk at once, and keep all of the rendered
+            # pages in memory however far behind the writers are. at most jobs * 2
+            # chunks are submitted instead, and the next one only once a result is taken
+            in_flight = deque()
+            for chunk in read_chunks(chunksize):
+                if len(in_flight) == jobs * 2:
+                    yield in_flight.popleft().result()
+                in_flight.append(pool.submit(convert_chunk, chunk))
+            while in_flight:
+                yield in_flight.popleft().result()
+
+        yield from collect_chunks(chunks(), cache_stats, profiler)
+
+
+def collect_chunks(chunks, cache_stats, profiler):
+    for chunk_results, chunk_stats, chunk_events in chunks:
+        profiler.add_events(chunk_events)
+        if cache_stats is not None:
+            for key, value in chunk_stats.items():
+                cache_stats[key] = cache_stats.get(key, 0) + value
+        yield from chunk_results
+
+
+def discover(config, infile, profiler=null_profiler):
+    """find every file in infile and create the sorted toc, filling in the folder config defaults"""
+    with profiler.span("discovery"):
+        working_files = find_markdown(infile, config["general"]["ignore-dirs"])
+    with profiler.span("toc build and sort"):
+        toc = create_tables_of_contents(config, working_files)
+        add_folder_config_defaults(config, toc)
+        toc = sort_toc(config, toc)
     print_work_report(toc)
+    return working_files, toc
 
-    # create HTML files!!
-    convert_markdown_to_html = create_page_converter(config, toc)
+
+def read_page(infile, dir, filename, ext):
+    with open(f"{os.path.join(infile, dir, filename)}{ext}", "r") as f:
+        return f.read()
+
+
+def write_page(outfile, dir, filename, html, fingerprints=None, previous_output=None):
+    """write a page through a temporary file, unless the file already has the same contents,
+    so its mtime only changes with its contents. previous_output is the hash of what the
+    page's file had in the last build; without it, a file of the same size is read to compare.
+    returns the hash of the page and whether it was written
+    """
+    if fingerprints:
+        html = rewrite_asset_urls(html, fingerprints)
+    data = html.encode()
+    output = hash_bytes(data)
+    path = f"{os.path.join(outfile, dir, filename)}.html"
+    if previous_output in (output, None):
+        try:
+            if os.stat(path).st_size == len(data):
+                if previous_output is not None:
+                    return output, False
+                with open(path, "rb") as f:
+                    if f.read() == data:
+                        return output, False
+        except FileNotFoundError:
+            pass
+    write_file(path, data)
+    return output, True
+
+
+def write_index_pages(outfile, dir, converter, names, fingerprints=None):
+    """write the pages after the first of a paginated folder index, and remove those which
+    a longer index had before. names are the (dir, filename) of every note, which are never
+    overwritten or removed. returns how many pages were written, unchanged and removed,
+    and the names of the notes in the way of a page"""
+    written = 0
+    unchanged = 0
+    conflicts = []
+    count = converter.count_index_pages(dir)
+    for number in range(2, count + 1):
+        if (dir, index_page_name(number)) in names:
+            conflicts.append(index_page_name(number))
+            continue
+        _, page_written = write_page(
+            outfile,
+            dir,
+            index_page_name(number),
+            converter("index", dir, ".md", "", number),
+            fingerprints,
+        )
+        written += page_written
+        unchanged += not page_written
+    removed = remove_index_pages(outfile, dir, names, count + 1)
+    return written, unchanged, removed, conflicts
+
+
+def remove_index_pages(outfile, dir, names, first=2):
+    removed = 0
+    number = first
+    while (dir, index_page_name(number)) not in names and os.path.exists(
+        f"{os.path.join(outfile, dir, index_page_name(number))}.html"
+    ):
+        os.remove(f"{os.path.join(outfile, dir, index_page_name(number))}.html")
+        removed += 1
+        number += 1
+    return removed
+
+
+def build_pages(
+    config,
+    infile,
+    outfile,
+    working_files,
+    toc,
+    previous_manifest=None,
+    jobs=1,
+    assets=(),
+    profiler=null_profiler,
+    render_cache=None,
+    read_jobs=1,
+    write_jobs=1,
+):
+    """convert the discovered files. if a previous manifest is given,
+    pages whose source and navigation are unchanged since that build are skipped.
+    assets are the files copied into outfile, which are recorded in the manifest.
+    render_cache is the path of a render cache to reuse rendered markdown from.
+    pages are read by read_jobs threads, rendered by jobs processes and written by write_jobs threads.
+    returns the new manifest, a dict of pages which could not be converted
+    and the page index and backlinks given to the converter"""
+    manifest = create_manifest(config, toc)
+    manifest["assets"] = sorted(assets)
+    if config["general"]["fingerprint-assets"]:
+        with profiler.span("fingerprint"):
+            manifest["fingerprints"] = fingerprint_assets(
+                outfile, assets, (previous_manifest or {}).get("fingerprints")
+            )
+    else:
+        remove_fingerprints(outfile, (previous_manifest or {}).get("fingerprints"))
+    previous_pages = {}
+    previous_search = None
+    if previous_manifest and manifests_compatible(previous_manifest, manifest):
+        previous_pages = previous_manifest["pages"]
+        previous_search = previous_manifest.get("search")
+    elif previous_manifest:
+        print(
+            "\033[93mConfig, theme, fingerprinted assets or version changed; rebuilding every page\033[0m"
+        )
+    search_index = None
+    if config["general"]["search"]:
+        search_index = SearchIndex(config, outfile, previous_search)
+    else:
+        remove_search_index(outfile)
+    # the hash of every page's HTML, so pages which render the same aren't written again
+    previous_outputs = (previous_manifest or {}).get("outputs", {})
+    outputs = {}
+    written = 0
+    unchanged = 0
+    nav_hashes = {}
+    sources = set()
+    source_hashes = {}
+    page_links = {}
+    pages = []
+
+    markdown_files = []
     for dir, filename, ext in working_files:
         if not supported_ext(ext):
             continue
@@ -51,20 +382,239 @@ def work(config, infile, outfile):
         if not os.path.exists(outdir):
             os.makedirs(outdir)
 
-        if ext == "html":
-            shutil.copy(
-                f"{os.path.join(infile, dir, filename)}{ext}",
-                f"{os.path.join(outdir, filename)}.html",
+        markdown_files.append((dir, filename, ext))
+
+    def read(file):
+        dir, filename, ext = file
+        with profiler.span("read", f"{dir}/{filename}{ext}"):
+            return read_page(infile, dir, filename, ext)
+
+    def scan(file):
+        contents = read(file)
+        return hash_bytes(contents.encode()), find_local_links(contents)
+
+    # reading is mostly waiting for the disk, so it happens in threads.
+    # links between folders can only be resolved once every page was read, so this
+    # first pass only keeps the hash and links of each page. the pages which need
+    # rendering are read again later, a few chunks at a time
+    with ThreadPoolExecutor(read_jobs) as readers:
+        for (dir, filename, ext), (source_hash, local_links) in zip(
+            markdown_files, readers.map(scan, markdown_files)
+        ):
+            source_hashes[(dir, filename, ext)] = source_hash
+            page_links[(dir, filename)] = local_links
+
+    # every page is known now, so links between folders can be resolved
+    page_index = create_page_index(config, working_files)
+    backlinks, broken_links = create_backlinks(page_index, page_links)
+    links = {"index": page_index, "backlinks": backlinks}
+
+    if config["general"]["nav-mode"] == "inline":
+        remove_nav_fragments(outfile)
+    else:
+        with profiler.span("nav fragments"):
+            navs_written = write_nav_fragments(
+                outfile, toc, create_page_converter(config, toc).create_nav
+            )
+        print(
+            f"\033[92mnav: wrote {navs_written} folder navs, {len(toc) - navs_written} already up to date\033[0m"
+        )
+
+    for (dir, filename, ext), source_hash in source_hashes.items():
+        # skip pages whose inputs are identical to the previous build
+        if dir not in nav_hashes:
+            nav_hashes[dir] = hash_nav(config, toc, dir)
+        page = {
+            "source": source_hash,
+            "nav": nav_hashes[dir],
+            "links": hash_links(links, dir, filename, page_links[(dir, filename)]),
+        }
+        if filename == "index":
+            page["toc"] = hash_index_toc(toc, dir)
+        sources.add(f"{dir}/{filename}{ext}")
+        manifest["pages"][f"{dir}/{filename}{ext}"] = page
+        if previous_pages.get(f"{dir}/{filename}{ext}") == page and os.path.exists(
+            f"{os.path.join(outfile, dir, filename)}.html"
+        ):
+            if f"{dir}/{filename}{ext}" in previous_outputs:
+                outputs[f"{dir}/{filename}{ext}"] = previous_outputs[
+                    f"{dir}/{filename}{ext}"
+                ]
+            continue
+        pages.append((filename, dir, ext))
+
+    def read_chunk(chunk):
+        files = [(dir, filename, ext) for filename, dir, ext in chunk]
+        return [
+            (filename, dir, ext, contents)
+            for (filename, dir, ext), contents in zip(chunk, readers.map(read, files))
+        ]
+
+    # create HTML files!!
+    # pages are written by threads while the next ones are rendered. at most
+    # write_jobs * 4 rendered pages wait to be written, and iter_convert_pages
+    # reads and renders only a few chunks ahead, so neither sources nor rendered
+    # pages pile up
+    write_slots = threading.BoundedSemaphore(write_jobs * 4)
+
+    def write(dir, filename, ext, html):
+        try:
+            with profiler.span("write", f"{dir}/{filename}{ext}"):
+                return write_page(
+                    outfile,
+                    dir,
+                    filename,
+                    html,
+                    manifest.get("fingerprints"),
+                    previous_outputs.get(f"{dir}/{filename}{ext}"),
+                )
+        finally:
+            write_slots.release()
+
+    cache_stats = {}
+    results = []
+    with ThreadPoolExecutor(read_jobs) as readers, ThreadPoolExecutor(
+        write_jobs
+    ) as writers:
+        for (filename, dir, ext), (this_html, error) in zip(
+            pages,
+            iter_convert_pages(
+                config,
+                toc,
+                pages,
+                jobs,
+                cache_stats,
+                profiler,
+                links,
+                render_cache,
+                read_chunk,
+            ),
+        ):
+            if error is not None:
+                results.append((f"{dir}/{filename}{ext}", error))
+                continue
+            write_slots.acquire()
+            results.append(
+                (
+                    f"{dir}/{filename}{ext}",
+                    writers.submit(write, dir, filename, ext, this_html),
+                )
             )
+            if search_index is not None:
+                with profiler.span("search index", f"{dir}/{filename}{ext}"):
+                    search_index.add_page(dir, filename, ext, this_html)
+
+    # report errors in the order of the pages, whichever stage they happened in
+    errors = {}
+    for page, result in results:
+        if not isinstance(result, str):
+            if result.exception() is None:
+                outputs[page], page_written = result.result()
+                written += page_written
+                unchanged += not page_written
+                continue
+            result = f"{type(result.exception()).__name__}: {result.exception()}"
+        errors[page] = result
+        del manifest["pages"][page]
+        if search_index is not None:
+            search_index.remove_page(page)
+
+    # the rest of the index of folders with a page-size, if their index was rendered.
+    # index_pages is how many pages each paginated index has, for the sitemap
+    names = {(dir, filename) for dir, filename, _ in working_files}
+    removed = 0
+    index_converter = None
+    index_pages = {
+        page: count
+        for page, count in (previous_manifest or {}).get("index pages", {}).items()
+        if page in manifest["pages"]
+    }
+    for filename, dir, ext in pages:
+        page = f"{dir}/{filename}{ext}"
+        if filename != "index" or dir == "" or page in errors:
             continue
+        if index_converter is None:
+            index_converter = create_page_converter(config, toc, links=links)
+        with profiler.span("index pages", dir):
+            index_written, index_unchanged, index_removed, conflicts = (
+                write_index_pages(
+                    outfile, dir, index_converter, names, manifest.get("fingerprints")
+                )
+            )
+        written += index_written
+        unchanged += index_unchanged
+        removed += index_removed
+        index_pages.pop(page, None)
+        if conflicts:
+            # the index is tried again by the next build, until the notes are renamed
+            errors[page] = (
+                f"the notes {', '.join(conflicts)} have the names of pages of this index"
+            )
+            del manifest["pages"][page]
+        elif index_converter.count_index_pages(dir) > 1:
+            index_pages[page] = index_converter.count_index_pages(dir)
+    manifest["index pages"] = index_pages
+    print_error_report(errors)
+    print_cache_report(cache_stats)
+    print_minify_report(cache_stats)
+    print_broken_links_report(broken_links)
+
+    # remove pages whose source no longer exists
+    if previous_manifest:
+        for page in previous_manifest.get("pages", {}):
+            if page in sources:
+                continue
+            if search_index is not None:
+                search_index.remove_page(page)
+            dir, filename = page.rsplit("/", 1)
+            stale_file = (
+                f"{os.path.join(outfile, dir, os.path.splitext(filename)[0])}.html"
+            )
+            if os.path.exists(stale_file):
+                os.remove(stale_file)
+                removed += 1
+            if os.path.splitext(filename)[0] == "index":
+                removed += remove_index_pages(outfile, dir, names)
+        rendered = len(pages) - len(errors)
+        print_incremental_report(rendered, len(manifest["pages"]) - rendered)
+    print_write_report(written, unchanged, removed)
+    manifest["outputs"] = outputs
 
-        # read markdown into a string
-        with open(f"{os.path.join(infile, dir, filename)}{ext}", "r") as f:
-            contents = "".join(f.readlines())
+    if search_index is not None:
+        with profiler.span("search index"):
+            manifest["search"] = search_index.finish()
+    with profiler.span("sitemap"):
+        track_lastmod(infile, manifest, previous_manifest)
+        write_sitemap(config, outfile, manifest)
+    save_manifest(outfile, manifest)
+    return manifest, errors, links
 
-        # convert markdown to html
-        this_html = convert_markdown_to_html(filename, dir, ext, contents)
 
-        # create html file
-        with open(f"{os.path.join(outdir, filename)}.html", "w") as f:
-            f.write(this_html)
+def work(
+    config,
+    infile,
+    outfile,
+    previous_manifest=None,
+    jobs=1,
+    assets=(),
+    profiler=null_profiler,
+    render_cache=None,
+    read_jobs=1,
+    write_jobs=1,
+):
+    """convert every supported file in infile. returns a dict of pages which could not be converted"""
+    working_files, toc = discover(config, infile, profiler)
+    return build_pages(
+        config,
+        infile,
+        outfile,
+        working_files,
+        toc,
+        previous_manifest,
+        jobs,
+        assets,
+        profiler,
+        render_cache,
+        read_jobs,
+        write_jobs,
+    )[1]
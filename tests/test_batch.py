@@ -0,0 +1,57 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import os
+import pytest
+from mash.batch import batch, load_sites
+
+
+@pytest.fixture(autouse=True)
+def render_cache_home(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+
+
+def test_load_sites_resolves_paths(tmp_path):
+    (tmp_path / "sites.json").write_text(
+        json.dumps([{"input": "notes", "output": "/srv/a", "args": ["--clean"]}])
+    )
+    assert load_sites(tmp_path / "sites.json") == [
+        ["--input", f"{tmp_path}/notes", "--output", "/srv/a", "--no-daemon", "--clean"]
+    ]
+    (tmp_path / "sites.json").write_text(json.dumps([{"input": "notes", "ouput": "a"}]))
+    with pytest.raises(ValueError):
+        load_sites(tmp_path / "sites.json")
+
+
+def test_batch_builds_every_site(tmp_path, capsys):
+    notes = os.path.abspath("notes")
+    (tmp_path / "sites.json").write_text(
+        json.dumps(
+            [
+                {"input": notes, "output": "a", "args": ["--clean"]},
+                {"input": notes, "output": "b", "args": ["--clean"]},
+                {"input": "missing", "output": "c"},
+            ]
+        )
+    )
+    assert batch([str(tmp_path / "sites.json"), "--jobs", "2"]) == 1
+    out = capsys.readouterr().out
+    assert "batch: built 2 of 3 sites" in out
+    assert f"{tmp_path}/missing not found" in out
+    assert os.path.exists(tmp_path / "a" / "index.html")
+    assert os.path.exists(tmp_path / "b" / "index.html")
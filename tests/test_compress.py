@@ -0,0 +1,68 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import gzip
+import os
+from mash.compress import *
+
+
+def test_compress_file(tmp_path):
+    (tmp_path / "page.html").write_text("<p>hello</p>" * 100)
+    assert compress_file(str(tmp_path / "page.html"))[0] == "compressed"
+    with gzip.open(tmp_path / "page.html.gz", "rt") as f:
+        assert f.read() == "<p>hello</p>" * 100
+    assert compress_file(str(tmp_path / "page.html")) == ("up to date", 0)
+
+
+def test_compress_file_recompresses_changed_source(tmp_path):
+    (tmp_path / "page.html").write_text("<p>hello</p>" * 100)
+    compress_file(str(tmp_path / "page.html"))
+    (tmp_path / "page.html").write_text("<p>goodbye</p>" * 100)
+    os.utime(tmp_path / "page.html", (1, 1))
+    assert compress_file(str(tmp_path / "page.html"))[0] == "compressed"
+    with gzip.open(tmp_path / "page.html.gz", "rt") as f:
+        assert f.read() == "<p>goodbye</p>" * 100
+
+
+def test_compress_tree_skips_incompressible_and_orphans(tmp_path):
+    (tmp_path / "tiny.css").write_text("a{}")
+    (tmp_path / "gone.js.gz").write_bytes(b"")
+    (tmp_path / "data.gz").write_bytes(b"")
+    stats = compress_tree(str(tmp_path))
+    assert stats["not worth it"] == 1
+    assert sorted(os.listdir(tmp_path)) == [
+        ".mash-gzip-skipped.json",
+        "data.gz",
+        "tiny.css",
+    ]
+
+
+def test_compress_tree_remembers_files_not_worth_compressing(tmp_path, monkeypatch):
+    (tmp_path / "tiny.css").write_text("a{}")
+    compress_tree(str(tmp_path))
+    compressed = []
+    compress = gzip.compress
+    monkeypatch.setattr(
+        gzip,
+        "compress",
+        lambda data, **kwargs: compressed.append(data) or compress(data, **kwargs),
+    )
+    assert compress_tree(str(tmp_path))["not worth it"] == 1
+    assert compressed == []
+    (tmp_path / "tiny.css").write_text("b{}")
+    os.utime(tmp_path / "tiny.css", (1, 1))
+    assert compress_tree(str(tmp_path))["not worth it"] == 1
+    assert compressed == [b"b{}"]
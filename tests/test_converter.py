@@ -14,9 +14,16 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import copy
 import pytest
-from mash.converter import create_page_converter
-from mash.util import default_config, create_tables_of_contents
+from mash.converter import create_page_converter, rewrite_local_links
+from mash.links import create_backlinks, create_page_index
+from mash.util import (
+    default_config,
+    create_tables_of_contents,
+    add_folder_config_defaults,
+    sort_toc,
+)
 
 
 @pytest.fixture
@@ -35,3 +42,86 @@ def test_converter_adds_page_title(converter):
         converted[gayi - 7 : gayi + len(title) + 8]
         == f"<title>{default_config["general"]["title"]}</title>"
     )
+
+
+def test_converter_renders_nav_once_per_dir():
+    config = copy.deepcopy(default_config)
+    toc = {"": ["Example Page"], "Fruits": ["Apple", "Orange"]}
+    add_folder_config_defaults(config, toc)
+    converter = create_page_converter(config, toc)
+    first = converter("Apple", "Fruits", ".md", "")
+    second = converter("Orange", "Fruits", ".md", "")
+    assert converter.cache_stats["hits"] == 1
+    assert converter.cache_stats["misses"] == 1
+    nav = lambda page: page[page.index("<nav>") : page.index("</nav>")]
+    assert nav(first) == nav(second)
+
+
+def test_rewrite_local_links():
+    rewrite = lambda label, dest: f"[{label}]({dest})"
+    assert (
+        rewrite_local_links("see [[Apple]] or [[an orange|Orange]]", rewrite)
+        == "see [Apple](Apple) or [an orange](Orange)"
+    )
+
+
+def test_rewrite_local_links_ignores_code():
+    rewrite = lambda label, dest: f"[{label}]({dest})"
+    content = "`[[span]]`\n\n```\n[[fenced]]\n```\n[[Apple]]"
+    assert (
+        rewrite_local_links(content, rewrite)
+        == "`[[span]]`\n\n```\n[[fenced]]\n```\n[Apple](Apple)"
+    )
+
+
+def test_rewrite_local_links_unclosed():
+    rewrite = lambda label, dest: f"[{label}]({dest})"
+    assert rewrite_local_links("]] [[Apple", rewrite) == "]] [[Apple"
+
+
+def test_converter_expands_nested_folders():
+    config = copy.deepcopy(default_config)
+    toc = {"": [], "Notes": [], "Notes/A": ["Apple"], "Notes/B": ["Banana"]}
+    add_folder_config_defaults(config, toc)
+    converter = create_page_converter(config, toc)
+    page = converter("Apple", "Notes/A", ".md", "")
+    nav = page[page.index("<nav>") : page.index("</nav>")]
+    assert "href='/Notes/A/Apple.html'" in nav
+    assert "href='/Notes/B/index.html'" in nav
+    assert "Banana" not in nav
+    # the back link leads to the page's own folder
+    assert '<a href="/Notes/A/index.html">' in page
+
+
+def test_converter_links_across_folders():
+    config = copy.deepcopy(default_config)
+    config["general"]["backlinks"] = True
+    working_files = [("", "index", ".md"), ("Fruits", "Apple", ".md")]
+    toc = create_tables_of_contents(config, working_files)
+    add_folder_config_defaults(config, toc)
+    page_index = create_page_index(config, working_files)
+    backlinks, _ = create_backlinks(page_index, {("", "index"): ["Apple"]})
+    converter = create_page_converter(
+        config, toc, links={"index": page_index, "backlinks": backlinks}
+    )
+    assert '<a href="/Fruits/Apple.html">' in converter("index", "", ".md", "[[Apple]]")
+    assert "Linked from:" in converter("Apple", "Fruits", ".md", "")
+    assert "Linked from:" not in converter("index", "", ".md", "")
+
+
+def test_converter_paginates_folder_index():
+    config = copy.deepcopy(default_config)
+    config["folders"]["Fruits"] = {"page-size": 2, "sort-reverse": True}
+    toc = {"": [], "Fruits": ["Apple", "Banana", "Cherry"]}
+    add_folder_config_defaults(config, toc)
+    toc = sort_toc(config, toc)
+    converter = create_page_converter(config, toc)
+    assert converter.count_index_pages("Fruits") == 2
+    first = converter("index", "Fruits", ".md", "fruits")
+    assert "Cherry.html" in first and "Banana.html" in first
+    assert "Apple.html" not in first.split("</nav>", 1)[1]
+    assert "<a rel='next' href='/Fruits/index-2.html'>" in first
+    second = converter("index", "Fruits", ".md", "", 2)
+    assert "Apple.html" in second.split("</nav>", 1)[1]
+    assert "<a rel='prev' href='/Fruits/index.html'>" in second
+    assert "page 2 of 2" in second and "rel='next'" not in second
@@ -0,0 +1,74 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import os
+import socket
+from mash.daemon import find_socket_problem, handle, peer_uid, run_client, serve
+
+
+def test_run_client_without_daemon(tmp_path):
+    os.chmod(tmp_path, 0o700)
+    assert run_client(["--version"], str(tmp_path / "mash.sock")) is None
+    assert run_client(["--version"], str(tmp_path / "missing" / "mash.sock")) is None
+
+
+def test_find_socket_problem(tmp_path):
+    os.chmod(tmp_path, 0o700)
+    assert find_socket_problem(str(tmp_path / "mash.sock")) is None
+    (tmp_path / "mash.sock").write_text("")
+    assert "not a socket" in find_socket_problem(str(tmp_path / "mash.sock"))
+    os.chmod(tmp_path, 0o777)
+    assert "other users" in find_socket_problem(str(tmp_path / "other.sock"))
+
+
+def test_client_and_daemon_refuse_shared_folders(tmp_path, capsys):
+    os.chmod(tmp_path, 0o777)
+    assert run_client(["--version"], str(tmp_path / "mash.sock")) is None
+    assert "not using the daemon" in capsys.readouterr().out
+    assert serve(str(tmp_path / "mash.sock"), None) == 1
+    assert not os.path.exists(tmp_path / "mash.sock")
+
+
+def test_peer_uid():
+    client, server = socket.socketpair()
+    with client, server:
+        assert peer_uid(server) in (None, os.getuid())
+
+
+def test_handle_sends_output_and_status(tmp_path, monkeypatch):
+    # handle() changes the working directory, which is restored afterwards
+    monkeypatch.chdir(tmp_path)
+
+    def build(argv, sites):
+        sites["calls"] = sites.get("calls", 0) + 1
+        print("building", *argv, "in", os.getcwd())
+        return 1
+
+    sites = {}
+    client, server = socket.socketpair()
+    with client, server:
+        client.sendall(
+            json.dumps({"argv": ["-i", "notes"], "cwd": str(tmp_path)}).encode() + b"\n"
+        )
+        handle(server, build, sites)
+        server.shutdown(socket.SHUT_WR)
+        replies = [json.loads(line) for line in client.makefile("rb")]
+    assert "".join(reply.get("output", "") for reply in replies) == (
+        f"building -i notes in {tmp_path}\n"
+    )
+    assert replies[-1] == {"exit": 1}
+    assert sites == {"calls": 1}
@@ -0,0 +1,69 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import os
+from mash.fingerprint import (
+    fingerprint_assets,
+    rewrite_asset_urls,
+    rewrite_css_urls,
+)
+
+
+def test_rewrite_css_urls():
+    fingerprints = {"/theme/bg.png": "/theme/bg.0123456789ab.png"}
+    css = 'a { background: url("/theme/bg.png"); } b { background: url(theme/bg.png?v=1) }'
+    assert rewrite_css_urls(css, "", fingerprints) == (
+        'a { background: url("/theme/bg.0123456789ab.png"); }'
+        " b { background: url(/theme/bg.0123456789ab.png?v=1) }"
+    )
+    css = "c { background: url(data:image/png;base64,AAAA) url(/theme/gone.png) }"
+    assert rewrite_css_urls(css, "", fingerprints) == css
+
+
+def test_rewrite_asset_urls():
+    fingerprints = {"/style.css": "/style.0123456789ab.css"}
+    html = '<link href="/style.css"><a href="/style.css#top"></a><a href="/Apple.html">'
+    assert rewrite_asset_urls(html, fingerprints) == (
+        '<link href="/style.0123456789ab.css"><a href="/style.0123456789ab.css#top"></a>'
+        '<a href="/Apple.html">'
+    )
+
+
+def test_fingerprint_assets(tmp_path):
+    os.makedirs(tmp_path / "theme")
+    os.makedirs(tmp_path / "img")
+    (tmp_path / "theme" / "bg.png").write_bytes(b"background")
+    (tmp_path / "img" / "apple.svg").write_bytes(b"apple")
+    (tmp_path / "style.css").write_text('body { background: url("/theme/bg.png") }')
+    (tmp_path / "robots.txt").write_text("")
+    assets = ["theme/bg.png", "img/apple.svg", "style.css", "robots.txt"]
+    fingerprints = fingerprint_assets(str(tmp_path), assets)
+    assert set(fingerprints) == {"/theme/bg.png", "/img/apple.svg", "/style.css"}
+    bg = fingerprints["/theme/bg.png"]
+    assert (tmp_path / bg.lstrip("/")).read_bytes() == b"background"
+    assert bg in (tmp_path / fingerprints["/style.css"].lstrip("/")).read_text()
+    assert json.loads((tmp_path / "asset-manifest.json").read_text()) == fingerprints
+
+    # a changed asset gets a new name, and so does the stylesheet referring to it
+    os.remove(tmp_path / "theme" / "bg.png")
+    (tmp_path / "theme" / "bg.png").write_bytes(b"new background")
+    new_fingerprints = fingerprint_assets(str(tmp_path), assets, fingerprints)
+    assert new_fingerprints["/img/apple.svg"] == fingerprints["/img/apple.svg"]
+    assert new_fingerprints["/theme/bg.png"] != bg
+    assert new_fingerprints["/style.css"] != fingerprints["/style.css"]
+    assert not os.path.exists(tmp_path / bg.lstrip("/"))
+    assert not os.path.exists(tmp_path / fingerprints["/style.css"].lstrip("/"))
@@ -0,0 +1,62 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import copy
+import pytest
+from mash.links import create_backlinks, create_page_index, resolve_link
+from mash.util import default_config
+
+
+@pytest.fixture
+def page_index():
+    config = copy.deepcopy(default_config)
+    config["general"]["aliases"] = {"Citrus": "Fruits/Orange"}
+    return create_page_index(
+        config,
+        [
+            ("", "Apple", ".md"),
+            ("", "index", ".md"),
+            ("Fruits", "Apple", ".md"),
+            ("Fruits", "Orange", ".md"),
+            ("Fruits", "index", ".md"),
+            ("Fruits", "photo", ".png"),
+        ],
+    )
+
+
+def test_resolve_link_prefers_same_folder(page_index):
+    assert resolve_link(page_index, "Fruits", "Apple") == ("Fruits", "Apple")
+    assert resolve_link(page_index, "", "Apple") == ("", "Apple")
+
+
+def test_resolve_link_across_folders(page_index):
+    assert resolve_link(page_index, "", "Fruits/Orange") == ("Fruits", "Orange")
+    assert resolve_link(page_index, "", "Orange") == ("Fruits", "Orange")
+    assert resolve_link(page_index, "", "Citrus") == ("Fruits", "Orange")
+    assert resolve_link(page_index, "", "Fruits") == ("Fruits", "index")
+    assert resolve_link(page_index, "", "photo") is None
+
+
+def test_create_backlinks(page_index):
+    backlinks, broken = create_backlinks(
+        page_index,
+        {
+            ("", "index"): ["Orange", "Kiwi"],
+            ("Fruits", "Apple"): ["Orange", "Apple"],
+        },
+    )
+    assert backlinks == {("Fruits", "Orange"): [("", "index"), ("Fruits", "Apple")]}
+    assert broken == [(("", "index"), "Kiwi")]
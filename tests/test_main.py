@@ -34,6 +34,15 @@ tmp1 = pytest.fixture(tmp)
 tmp2 = pytest.fixture(tmp)
 
 
+@pytest.fixture(autouse=True)
+def render_cache_home(tmp_path, monkeypatch):
+    # keep the render cache of test builds out of the real cache directory,
+    # and don't send them to a daemon which might be running
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    return tmp_path
+
+
 def test_main_creates_index(tmp1):
     old_dir_state = os.path.exists(f"{tmp1}/index.html")
     main(["-i", "notes", "-o", tmp1, "--clean"])
@@ -83,3 +92,168 @@ def test_main_config_include_dirs_copies_file(tmp1, tmp2):
     with open(f"{tmp1}/notes/test/not-markdown.txt", "r") as fp:
         content = fp.readlines()
     assert content == ["example"]
+
+
+def test_main_refuses_existing_target(tmp1):
+    assert main(["-i", "notes", "-o", tmp1]) == 1
+
+
+def test_main_incremental_only_rebuilds_changed_pages(tmp1, tmp2):
+    shutil.copytree("notes", f"{tmp1}/notes")
+    main(["-i", f"{tmp1}/notes", "-o", tmp2, "--clean"])
+    os.utime(f"{tmp2}/Example Page.html", (0, 0))
+    os.utime(f"{tmp2}/Session Recaps/Session 1.html", (0, 0))
+    with open(f"{tmp1}/notes/Session Recaps/Session 1.md", "a") as fp:
+        fp.write("\nan edit")
+    assert main(["-i", f"{tmp1}/notes", "-o", tmp2, "--incremental"]) == 0
+    assert os.path.getmtime(f"{tmp2}/Example Page.html") == 0
+    assert os.path.getmtime(f"{tmp2}/Session Recaps/Session 1.html") != 0
+
+
+def test_main_incremental_removes_deleted_pages(tmp1, tmp2):
+    shutil.copytree("notes", f"{tmp1}/notes")
+    main(["-i", f"{tmp1}/notes", "-o", tmp2, "--clean"])
+    os.remove(f"{tmp1}/notes/Session Recaps/Session 2.md")
+    main(["-i", f"{tmp1}/notes", "-o", tmp2, "--incremental"])
+    assert not os.path.exists(f"{tmp2}/Session Recaps/Session 2.html")
+
+
+def test_main_jobs_output_identical(tmp1, tmp2):
+    main(["-i", "notes", "-o", tmp1, "--clean"])
+    main(["-i", "notes", "-o", tmp2, "--clean", "--jobs", "2"])
+    for dir, _, files in os.walk(tmp1):
+        for filename in files:
+            if not filename.endswith(".html"):
+                continue
+            path = os.path.relpath(os.path.join(dir, filename), tmp1)
+            with open(f"{tmp1}/{path}", "rb") as a, open(f"{tmp2}/{path}", "rb") as b:
+                assert a.read() == b.read()
+
+
+def test_main_incremental_removes_orphaned_assets(tmp1, tmp2):
+    shutil.copytree("notes", f"{tmp1}/notes")
+    main(["-i", f"{tmp1}/notes", "-o", tmp2, "--clean"])
+    os.remove(f"{tmp1}/notes/img/muffin.svg")
+    main(["-i", f"{tmp1}/notes", "-o", tmp2, "--incremental"])
+    assert not os.path.exists(f"{tmp2}/img/muffin.svg")
+    assert os.path.exists(f"{tmp2}/style.css")
+
+
+def test_main_atomic_swaps_generations(tmp1, tmp2):
+    shutil.copytree("notes", f"{tmp1}/notes")
+    assert main(["-i", f"{tmp1}/notes", "-o", f"{tmp2}/site", "--atomic"]) == 0
+    first = os.path.realpath(f"{tmp2}/site")
+    with open(f"{tmp1}/notes/Session Recaps/Session 1.md", "a") as fp:
+        fp.write("\nan edit")
+    assert main(["-i", f"{tmp1}/notes", "-o", f"{tmp2}/site", "--atomic"]) == 0
+    second = os.path.realpath(f"{tmp2}/site")
+    assert os.path.islink(f"{tmp2}/site") and first != second
+    # unchanged files are shared with the previous generation, changed ones are not
+    assert os.path.samefile(f"{first}/Example Page.html", f"{second}/Example Page.html")
+    with open(f"{first}/Session Recaps/Session 1.html") as fp:
+        assert "an edit" not in fp.read()
+    with open(f"{second}/Session Recaps/Session 1.html") as fp:
+        assert "an edit" in fp.read()
+
+
+def test_main_atomic_rollback(tmp1, tmp2):
+    main(["-i", "notes", "-o", f"{tmp2}/site", "--atomic"])
+    first = os.path.realpath(f"{tmp2}/site")
+    main(["-i", "notes", "-o", f"{tmp2}/site", "--atomic"])
+    assert main(["-o", f"{tmp2}/site", "--rollback"]) == 0
+    assert os.path.realpath(f"{tmp2}/site") == first
+    assert main(["-o", f"{tmp2}/site", "--rollback"]) == 1
+
+
+def test_main_atomic_rollback_through_symlinked_folder(tmp1, tmp2):
+    os.symlink(tmp2, f"{tmp1}/alias")
+    main(["-i", "notes", "-o", f"{tmp1}/alias/site", "--atomic"])
+    first = os.path.realpath(f"{tmp2}/site")
+    main(["-i", "notes", "-o", f"{tmp1}/alias/site", "--atomic"])
+    assert main(["-o", f"{tmp1}/alias/site", "--rollback"]) == 0
+    assert os.path.realpath(f"{tmp2}/site") == first
+
+
+def test_main_gzip(tmp1):
+    main(["-i", "notes", "-o", tmp1, "--clean", "--gzip"])
+    assert os.path.exists(f"{tmp1}/index.html.gz")
+    assert os.path.exists(f"{tmp1}/style.css.gz")
+
+
+def test_main_profile_with_jobs(tmp1, tmp2):
+    main(
+        ["-i", "notes", "-o", tmp1, "--clean", "-j", "2", "--profile", f"{tmp2}/t.json"]
+    )
+    with open(f"{tmp2}/t.json") as fp:
+        names = {event["name"] for event in json.load(fp)["traceEvents"]}
+    assert {"config load", "discovery", "markdown render", "write"} <= names
+
+
+def test_main_reuses_rendered_markdown_after_clean(tmp1, render_cache_home, capsys):
+    main(["-i", "notes", "-o", tmp1, "--clean"])
+    with open(f"{tmp1}/Example Page.html") as f:
+        first_build = f.read()
+    assert os.path.exists(f"{render_cache_home}/mash/render-cache.sqlite")
+    capsys.readouterr()
+    main(["-i", "notes", "-o", tmp1, "--clean"])
+    assert "render cache: 100% hit rate" in capsys.readouterr().out
+    with open(f"{tmp1}/Example Page.html") as f:
+        assert f.read() == first_build
+
+
+def test_main_fingerprints_assets(tmp1, tmp2):
+    shutil.copytree("notes", f"{tmp1}/notes")
+    with open(f"{tmp1}/notes/config.json", "r") as fp:
+        this_config = json.load(fp)
+    this_config["general"]["fingerprint-assets"] = True
+    with open(f"{tmp1}/notes/config.json", "w") as fp:
+        json.dump(this_config, fp)
+    assert main(["-i", f"{tmp1}/notes", "-o", tmp2, "--clean"]) == 0
+    with open(f"{tmp2}/asset-manifest.json") as f:
+        fingerprints = json.load(f)
+    with open(f"{tmp2}/index.html") as f:
+        index = f.read()
+    assert f'href="{fingerprints["/style.css"]}"' in index
+    assert os.path.exists(f"{tmp2}{fingerprints['/style.css']}")
+
+    this_config["general"]["fingerprint-assets"] = False
+    with open(f"{tmp1}/notes/config.json", "w") as fp:
+        json.dump(this_config, fp)
+    assert main(["-i", f"{tmp1}/notes", "-o", tmp2, "--incremental"]) == 0
+    assert not os.path.exists(f"{tmp2}/asset-manifest.json")
+    assert not os.path.exists(f"{tmp2}{fingerprints['/style.css']}")
+    with open(f"{tmp2}/index.html") as f:
+        assert 'href="/style.css"' in f.read()
+
+
+def test_main_daemon_sees_edits_during_first_build(tmp1, tmp2, monkeypatch):
+    from mash.watch import Site
+
+    shutil.copytree("notes", f"{tmp1}/notes")
+    build = Site.build
+
+    def build_and_edit(site):
+        errors = build(site)
+        with open(f"{tmp1}/notes/Example Page.md", "a") as fp:
+            fp.write("\nan edit during the build")
+        return errors
+
+    monkeypatch.setattr(Site, "build", build_and_edit)
+    sites = {}
+    argv = ["-i", f"{tmp1}/notes", "-o", tmp2, "--incremental", "--no-daemon"]
+    try:
+        assert main(argv, sites) == 0
+        assert main(argv, sites) == 0
+    finally:
+        for site in sites.values():
+            site.stop_watching()
+    with open(f"{tmp2}/Example Page.html") as fp:
+        assert "an edit during the build" in fp.read()
+
+
+def test_main_reports_invalid_layout(tmp1, tmp2, monkeypatch, capsys):
+    with open(f"{tmp1}/layout.html", "w") as fp:
+        fp.write("{{ content }}{{ sidebar }}")
+    monkeypatch.setattr("mash.__main__.get_theme_path", lambda theme: tmp1)
+    assert main(["-i", "notes", "-o", tmp2, "--no-daemon"]) == 1
+    assert f"Invalid theme layout {tmp1}/layout.html" in capsys.readouterr().out
@@ -0,0 +1,57 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import copy
+import pytest
+from mash.manifest import *
+from mash.util import default_config, add_folder_config_defaults
+
+
+@pytest.fixture
+def config():
+    return copy.deepcopy(default_config)
+
+
+@pytest.fixture
+def toc():
+    return {"": ["Example Page"], "Fruits": ["Apple"], "Veggies": ["Kale"]}
+
+
+def test_hash_nav_ignores_other_folders(config, toc):
+    add_folder_config_defaults(config, toc)
+    before = hash_nav(config, toc, "Fruits")
+    toc["Veggies"].append("Leek")
+    assert hash_nav(config, toc, "Fruits") == before
+    assert hash_nav(config, toc, "Veggies") != before
+
+
+def test_hash_nav_follows_embeddable_folders(config, toc):
+    add_folder_config_defaults(config, toc)
+    config["folders"]["Veggies"]["embeddable"] = True
+    before = hash_nav(config, toc, "Fruits")
+    toc["Veggies"].append("Leek")
+    assert hash_nav(config, toc, "Fruits") != before
+
+
+def test_manifests_incompatible_after_config_change(config, toc):
+    add_folder_config_defaults(config, toc)
+    old = create_manifest(config, toc)
+    config["general"]["title"] = "Changed"
+    assert not manifests_compatible(old, create_manifest(config, toc))
+
+
+def test_load_manifest_missing(tmp_path):
+    assert load_manifest(tmp_path) == {}
@@ -0,0 +1,80 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import copy
+from mash.converter import create_page_converter
+from mash.minify import minify_css, minify_css_file, minify_html
+from mash.util import default_config
+
+
+def test_minify_html_keeps_inline_spaces():
+    html = (
+        "<p>hello\n  world <em>a</em> <strong>b</strong></p>\n<ul>\n<li>x</li>\n</ul>\n"
+    )
+    assert minify_html(html) == (
+        "<p>hello world <em>a</em> <strong>b</strong></p><ul><li>x</li></ul>"
+    )
+
+
+def test_minify_html_keeps_preformatted_text():
+    html = "<div>\n<pre><code>x\n    y</code></pre>\n<p>a <code>b  c</code></p>\n</div>"
+    assert minify_html(html) == (
+        "<div><pre><code>x\n    y</code></pre><p>a <code>b  c</code></p></div>"
+    )
+    # a non-breaking space is content, not whitespace
+    assert minify_html("<p>a\u00a0 b</p>") == "<p>a\u00a0 b</p>"
+
+
+def test_minify_css():
+    css = (
+        '/* theme */\na :hover,\nb > c {\n  content: "x  ;  y";\n  margin: 0 auto;\n}\n'
+    )
+    assert minify_css(css) == 'a :hover,b>c{content:"x  ;  y";margin:0 auto}'
+
+
+def test_minify_css_file_only_writes_changes(tmp_path):
+    (tmp_path / "src.css").write_text("a {\n  color: red;\n}\n")
+    written, saved = minify_css_file(tmp_path / "src.css", tmp_path / "dst.css")
+    assert (written, saved) == (True, 8)
+    assert (tmp_path / "dst.css").read_text() == "a{color:red}"
+    assert minify_css_file(tmp_path / "src.css", tmp_path / "dst.css")[0] is False
+
+
+def test_converter_counts_minified_bytes():
+    config = copy.deepcopy(default_config)
+    config["general"]["minify"] = True
+    config["folders"][""] = {"embeddable": False, "nav-limit": -1}
+    converter = create_page_converter(config, {"": ["Apple"]})
+    html = converter("Apple", "", ".md", "some\ntext\n\n* a\n* b\n")
+    assert "\n" not in html
+    assert "<p>some text</p><ul><li>a</li><li>b</li></ul>" in html
+    config["general"]["minify"] = False
+    unminified = create_page_converter(config, {"": ["Apple"]})(
+        "Apple", "", ".md", "some\ntext\n\n* a\n* b\n"
+    )
+    assert converter.cache_stats["minified bytes"] == len(unminified) - len(html)
+
+
+def test_minify_html_keeps_space_around_comments():
+    assert minify_html("<p>See <!-- hi --> [[x]] now</p>") == (
+        "<p>See <!-- hi --> [[x]] now</p>"
+    )
+    assert minify_html("<!DOCTYPE html>\n<html>") == "<!DOCTYPE html><html>"
+
+
+def test_minify_css_keeps_semicolons_in_strings():
+    css = 'a { content: ";}" ; } b { color: red; /* last */ }'
+    assert minify_css(css) == 'a{content:";}"}b{color:red}'
@@ -0,0 +1,93 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import copy
+import os
+from mash.converter import create_page_converter
+from mash.nav import write_nav_fragments
+from mash.util import add_folder_config_defaults, default_config
+from mash.worker import discover, build_pages
+
+
+def test_converter_points_to_nav_fragment():
+    config = copy.deepcopy(default_config)
+    config["general"]["nav-mode"] = "script"
+    toc = {"": ["Example Page"], "Green Fruits": ["Apple"]}
+    add_folder_config_defaults(config, toc)
+    converter = create_page_converter(config, toc)
+    html = converter("Apple", "Green Fruits", ".md", "an apple")
+    assert "<nav data-src='/nav-fragments/Green%20Fruits/nav.html'>" in html
+    assert "Example&nbsp;Page" not in html
+    assert "Example&nbsp;Page" in converter.create_nav("Green Fruits")
+    config["general"]["nav-mode"] = "include"
+    html = create_page_converter(config, toc)("Apple", "Green Fruits", ".md", "")
+    assert '<!--#include virtual="/nav-fragments/Green%20Fruits/nav.html" -->' in html
+
+
+def test_write_nav_fragments(tmp_path):
+    toc = {"": [], "Fruits": [], "Fruits/Green": []}
+    create_nav = lambda dir: f"<nav>{dir}</nav>"
+    assert write_nav_fragments(str(tmp_path), toc, create_nav) == 3
+    assert (
+        tmp_path / "nav-fragments" / "Fruits" / "Green" / "nav.html"
+    ).read_text() == ("<nav>Fruits/Green</nav>")
+    assert os.path.exists(tmp_path / "nav-fragments" / "nav.js")
+    assert write_nav_fragments(str(tmp_path), {"": [], "Fruits": []}, create_nav) == 0
+    assert not os.path.exists(tmp_path / "nav-fragments" / "Fruits" / "Green")
+
+
+def test_new_page_only_rewrites_nav_fragments(tmp_path, capsys):
+    notes = tmp_path / "notes"
+    os.makedirs(notes / "Fruits")
+    (notes / "index.md").write_text("home")
+    (notes / "Fruits" / "Apple.md").write_text("apple")
+    config = copy.deepcopy(default_config)
+    config["general"]["nav-mode"] = "script"
+    working_files, toc = discover(config, str(notes))
+    manifest, _, _ = build_pages(
+        config, str(notes), str(tmp_path / "out"), working_files, toc
+    )
+    (notes / "Fruits" / "Orange.md").write_text("orange")
+    working_files, toc = discover(config, str(notes))
+    capsys.readouterr()
+    build_pages(config, str(notes), str(tmp_path / "out"), working_files, toc, manifest)
+    out = capsys.readouterr().out
+    assert "rendered 1 pages, skipped 2 unchanged pages" in out
+    assert "wrote 1 folder navs" in out
+    assert "wrote 1 files, left 0 identical files untouched" in out
+    assert (
+        "Orange"
+        in (tmp_path / "out" / "nav-fragments" / "Fruits" / "nav.html").read_text()
+    )
+
+
+def test_new_page_rerenders_folder_index(tmp_path, capsys):
+    notes = tmp_path / "notes"
+    os.makedirs(notes / "Fruits")
+    (notes / "Fruits" / "index.md").write_text("fruits")
+    (notes / "Fruits" / "Apple.md").write_text("apple")
+    config = copy.deepcopy(default_config)
+    config["general"]["nav-mode"] = "script"
+    working_files, toc = discover(config, str(notes))
+    manifest, _, _ = build_pages(
+        config, str(notes), str(tmp_path / "out"), working_files, toc
+    )
+    (notes / "Fruits" / "Orange.md").write_text("orange")
+    working_files, toc = discover(config, str(notes))
+    capsys.readouterr()
+    build_pages(config, str(notes), str(tmp_path / "out"), working_files, toc, manifest)
+    assert "rendered 2 pages, skipped 1 unchanged pages" in capsys.readouterr().out
+    assert "Orange" in (tmp_path / "out" / "Fruits" / "index.html").read_text()
@@ -0,0 +1,41 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+from mash.profiler import *
+
+
+def test_profiler_writes_chrome_trace(tmp_path):
+    profiler = Profiler()
+    with profiler.span("discovery"):
+        pass
+    with profiler.span("read", "/index.md"):
+        pass
+    profiler.write_trace(tmp_path / "trace.json")
+    with open(tmp_path / "trace.json") as f:
+        events = json.load(f)["traceEvents"]
+    assert [event["name"] for event in events] == ["discovery", "read"]
+    assert events[1]["args"] == {"page": "/index.md"}
+    assert all(event["ph"] == "X" for event in events)
+
+
+def test_profiler_take_events():
+    profiler = Profiler()
+    with profiler.span("read", "/index.md"):
+        pass
+    other = Profiler()
+    other.add_events(profiler.take_events())
+    assert profiler.events == [] and len(other.events) == 1
@@ -0,0 +1,47 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import pytest
+from mash.render_cache import RenderCache
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache" / "render-cache.sqlite")
+
+
+def test_render_cache_persists_after_flush(path):
+    cache = RenderCache(path, "salt")
+    cache.put(cache.key("*hi*"), "<p><em>hi</em></p>")
+    cache.close()
+    cache = RenderCache(path, "salt")
+    assert cache.get(cache.key("*hi*")) == "<p><em>hi</em></p>"
+    other_renderer = RenderCache(path, "other salt")
+    assert other_renderer.get(other_renderer.key("*hi*")) is None
+
+
+def test_render_cache_evicts_least_recently_used(path, monkeypatch):
+    cache = RenderCache(path)
+    for i, key in enumerate(["old", "used", "new"]):
+        monkeypatch.setattr("time.time", lambda: float(i))
+        cache.put(key, "x" * 10)
+        cache.flush()
+    monkeypatch.setattr("time.time", lambda: 3.0)
+    cache.get("used")
+    cache.flush()
+    assert cache.evict(20) == 1
+    assert cache.get("old") is None
+    assert cache.get("used") is not None
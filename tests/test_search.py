@@ -0,0 +1,85 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import copy
+import json
+import os
+import pytest
+from mash.search import SearchIndex, extract_text, tokenize
+from mash.util import default_config
+from mash.worker import work
+
+
+@pytest.fixture
+def config():
+    config = copy.deepcopy(default_config)
+    config["general"]["search"] = True
+    return config
+
+
+def page(text):
+    return f"<nav>nav</nav><article><div id='content'><p><a href=\"/index.html\">&lt; click to go back</a></p>{text}</div></article>"
+
+
+def read_shard(outfile, shard):
+    with open(os.path.join(outfile, "search-index", f"{shard}.json")) as f:
+        return json.load(f)
+
+
+def test_extract_text_skips_nav_and_back_link():
+    assert extract_text(page("<p>Fish &amp; chips</p>")).split() == [
+        "Fish",
+        "&",
+        "chips",
+    ]
+
+
+def test_tokenize_records_positions_without_stopwords():
+    assert tokenize("The apple and the Apple pie") == {"apple": [1, 4], "pie": [5]}
+
+
+def test_search_index_is_incremental(config, tmp_path):
+    search_index = SearchIndex(config, str(tmp_path))
+    search_index.add_page("Fruits", "Apple", ".md", page("apple pie"))
+    search_index.add_page("Fruits", "Pear", ".md", page("pear pie"))
+    entry = search_index.finish()
+    assert read_shard(tmp_path, "pi") == {"pie": [[0, 1], [1, 1]]}
+
+    search_index = SearchIndex(config, str(tmp_path), entry)
+    search_index.add_page("Fruits", "Apple", ".md", page("apple crumble"))
+    search_index.remove_page("Fruits/Pear.md")
+    entry = search_index.finish()
+    assert not os.path.exists(tmp_path / "search-index" / "pi.json")
+    assert read_shard(tmp_path, "cr") == {"crumble": [[2, 1]]}
+    assert list(entry["pages"]) == ["Fruits/Apple.md"]
+    with open(tmp_path / "search-index" / "index.json") as f:
+        assert json.load(f)["pages"] == {"2": ["/Fruits/Apple.html", "Apple"]}
+
+
+def test_search_skips_toc_and_backlinks(config, tmp_path):
+    notes = tmp_path / "notes"
+    os.makedirs(notes / "Fruits")
+    (notes / "Fruits" / "index.md").write_text("all the fruits")
+    (notes / "Fruits" / "Apple.md").write_text("crunchy, unlike a [[Pear]]")
+    (notes / "Fruits" / "Pear.md").write_text("soft")
+    config["general"]["backlinks"] = True
+    work(config, str(notes), str(tmp_path / "out"))
+    with open(tmp_path / "out" / "search-index" / "index.json") as f:
+        ids = {url: id for id, (url, _) in json.load(f)["pages"].items()}
+    apple = read_shard(tmp_path / "out", "ap")["apple"]
+    assert [ids["/Fruits/Apple.html"]] == [str(id) for id, *_ in apple]
+    # "Linked from:" only appears in the backlinks
+    assert not os.path.exists(tmp_path / "out" / "search-index" / "li.json")
@@ -0,0 +1,104 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import copy
+import os
+import pytest
+import mash.sitemap
+from mash.sitemap import track_lastmod, write_sitemap
+from mash.util import default_config
+
+
+@pytest.fixture
+def config():
+    config = copy.deepcopy(default_config)
+    config["general"]["site-url"] = "https://example.com/"
+    return config
+
+
+def test_track_lastmod_only_changes_with_source(tmp_path):
+    (tmp_path / "Apple.md").write_text("apple")
+    os.utime(tmp_path / "Apple.md", (0, 0))
+    previous = {"pages": {"/Apple.md": {"source": "1"}}, "lastmod": {"/Apple.md": "x"}}
+    manifest = {"pages": {"/Apple.md": {"source": "1"}}}
+    track_lastmod(str(tmp_path), manifest, previous)
+    assert manifest["lastmod"] == {"/Apple.md": "x"}
+    manifest = {"pages": {"/Apple.md": {"source": "2"}}}
+    track_lastmod(str(tmp_path), manifest, previous)
+    assert manifest["lastmod"] == {"/Apple.md": "1970-01-01T00:00:00+00:00"}
+
+
+def test_write_sitemap(config, tmp_path):
+    config["general"]["pretty-urls"] = True
+    manifest = {
+        "pages": {"/index.md": {}, "Fruits/Green Apple.md": {}},
+        "lastmod": {"/index.md": "2026-01-01", "Fruits/Green Apple.md": "2026-01-02"},
+    }
+    write_sitemap(config, str(tmp_path), manifest)
+    sitemap = (tmp_path / "sitemap.xml").read_text()
+    assert (
+        "<url><loc>https://example.com/</loc><lastmod>2026-01-01</lastmod></url>"
+        in sitemap
+    )
+    assert "<loc>https://example.com/Fruits/Green%20Apple</loc>" in sitemap
+
+
+def test_write_sitemap_lists_paginated_index_pages(config, tmp_path):
+    manifest = {
+        "pages": {"Fruits/index.md": {}},
+        "lastmod": {"Fruits/index.md": "2026-01-01"},
+        "index pages": {"Fruits/index.md": 3},
+    }
+    write_sitemap(config, str(tmp_path), manifest)
+    sitemap = (tmp_path / "sitemap.xml").read_text()
+    assert "<loc>https://example.com/Fruits/index-2.html</loc>" in sitemap
+    assert "<loc>https://example.com/Fruits/index-3.html</loc>" in sitemap
+    assert "index-4" not in sitemap
+
+
+def test_write_sitemap_index(config, tmp_path, monkeypatch):
+    monkeypatch.setattr(mash.sitemap, "max_urls", 2)
+    pages = [f"/{i}.md" for i in range(5)]
+    manifest = {
+        "pages": {page: {} for page in pages},
+        "lastmod": {page: f"2026-01-0{i + 1}" for i, page in enumerate(pages)},
+    }
+    write_sitemap(config, str(tmp_path), manifest)
+    index = (tmp_path / "sitemap.xml").read_text()
+    assert "<sitemapindex" in index
+    assert (
+        "<loc>https://example.com/sitemap-3.xml</loc><lastmod>2026-01-05</lastmod>"
+        in index
+    )
+    monkeypatch.setattr(mash.sitemap, "max_urls", 10)
+    write_sitemap(config, str(tmp_path), manifest)
+    assert not os.path.exists(tmp_path / "sitemap-1.xml")
+    assert "<urlset" in (tmp_path / "sitemap.xml").read_text()
+
+
+def test_write_sitemap_without_site_url_removes_old_sitemap(
+    config, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(mash.sitemap, "max_urls", 1)
+    manifest = {
+        "pages": {"/a.md": {}, "/b.md": {}},
+        "lastmod": {"/a.md": "2026-01-01", "/b.md": "2026-01-02"},
+    }
+    write_sitemap(config, str(tmp_path), manifest)
+    assert os.path.exists(tmp_path / "sitemap-2.xml")
+    config["general"]["site-url"] = None
+    write_sitemap(config, str(tmp_path), manifest)
+    assert os.listdir(tmp_path) == []
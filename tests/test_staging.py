@@ -0,0 +1,37 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+from mash.staging import *
+
+
+def test_stage_generation_migrates_existing_directory(tmp_path):
+    os.makedirs(tmp_path / "site")
+    (tmp_path / "site" / "index.html").write_text("old")
+    staging = stage_generation(str(tmp_path / "site"))
+    assert os.path.islink(tmp_path / "site")
+    assert (tmp_path / "site" / "index.html").read_text() == "old"
+    assert os.path.samefile(tmp_path / "site" / "index.html", f"{staging}/index.html")
+
+
+def test_prune_generations_keeps_current(tmp_path):
+    outfile = str(tmp_path / "site")
+    for _ in range(4):
+        publish(outfile, stage_generation(outfile))
+    prune_generations(outfile, 1)
+    generations = list_generations(outfile)
+    assert len(generations) == 2
+    assert generations[-1] == current_generation(outfile)
@@ -0,0 +1,70 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import pytest
+from mash.sync import *
+
+
+@pytest.fixture
+def src(tmp_path):
+    os.makedirs(tmp_path / "src" / "sub")
+    (tmp_path / "src" / "a.txt").write_text("apple")
+    (tmp_path / "src" / "sub" / "b.txt").write_text("banana")
+    return tmp_path / "src"
+
+
+@pytest.fixture
+def dst(tmp_path):
+    return tmp_path / "dst"
+
+
+def test_sync_tree_copies_everything(src, dst):
+    assert sync_tree(src, dst) == (["a.txt", os.path.join("sub", "b.txt")], 2)
+    assert (dst / "sub" / "b.txt").read_text() == "banana"
+
+
+def test_sync_tree_skips_unchanged(src, dst):
+    sync_tree(src, dst)
+    (src / "a.txt").write_text("apricot")
+    assert sync_tree(src, dst) == (["a.txt", os.path.join("sub", "b.txt")], 1)
+    assert (dst / "a.txt").read_text() == "apricot"
+
+
+def test_sync_file_checksum_ignores_mtime(src, dst):
+    sync_file(src / "a.txt", dst / "a.txt")
+    os.utime(dst / "a.txt", (0, 0))
+    assert sync_file(src / "a.txt", dst / "a.txt", checksum=True) == False
+    assert sync_file(src / "a.txt", dst / "a.txt") == True
+
+
+def test_sync_file_hardlink(src, dst):
+    sync_file(src / "a.txt", dst / "a.txt", link="hardlink")
+    assert os.path.samefile(src / "a.txt", dst / "a.txt")
+
+
+def test_sync_file_reflink(src, dst):
+    sync_file(src / "a.txt", dst / "a.txt", link="reflink")
+    assert (dst / "a.txt").read_text() == "apple"
+
+
+def test_remove_orphans_only_touches_synced_files(src, dst):
+    synced, _ = sync_tree(src, dst)
+    (dst / "page.html").write_text("generated")
+    os.remove(src / "a.txt")
+    assert remove_orphans(dst, synced, sync_tree(src, dst)[0]) == 1
+    assert not os.path.exists(dst / "a.txt")
+    assert os.path.exists(dst / "page.html")
@@ -0,0 +1,52 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import pytest
+from mash.template import (
+    compile_template,
+    default_layout,
+    find_layout,
+    find_layout_error,
+)
+
+
+def test_compile_template_fills_site_slots_once():
+    render = compile_template(
+        "<title>{{ title }}</title>{{nav}}<main>{{ content }}</main>",
+        {"title": "Notes"},
+    )
+    assert render(nav="<nav></nav>", content="hi") == (
+        "<title>Notes</title><nav></nav><main>hi</main>"
+    )
+
+
+def test_compile_template_rejects_unknown_slots():
+    with pytest.raises(ValueError):
+        compile_template("{{ sidebar }}", {})
+
+
+def test_find_layout_prefers_theme(tmp_path):
+    assert find_layout(str(tmp_path)) == default_layout
+    (tmp_path / "layout.html").write_text("{{ content }}")
+    assert find_layout(str(tmp_path)) == str(tmp_path / "layout.html")
+
+
+def test_find_layout_error(tmp_path):
+    assert find_layout_error(str(tmp_path)) is None
+    (tmp_path / "layout.html").write_text("{{ title }}{{ content }}{{ sidebar }}")
+    error = find_layout_error(str(tmp_path))
+    assert error.startswith(str(tmp_path / "layout.html"))
+    assert "{{ sidebar }}" in error
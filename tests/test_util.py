@@ -14,6 +14,7 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import os
 import pytest
 from mash.util import *
 
@@ -130,3 +131,64 @@ def test_create_tables_of_contents(config, markdown):
             "Jezzball",
         ],
     }
+
+
+@pytest.fixture
+def nested_notes(tmp_path):
+    for path in [
+        "index.md",
+        "Notes/B/x.md",
+        "Notes/A/B/x.md",
+        "Notes/A/B/index.md",
+        ".git/objects/x.md",
+        "Drafts/secret.md",
+    ]:
+        os.makedirs(os.path.dirname(tmp_path / path), exist_ok=True)
+        (tmp_path / path).write_text("")
+    return tmp_path
+
+
+def test_find_markdown_nested(nested_notes):
+    assert find_markdown(str(nested_notes), ignore=["Drafts"]) == [
+        ("", "index", ".md"),
+        ("Notes/A/B", "index", ".md"),
+        ("Notes/A/B", "x", ".md"),
+        ("Notes/B", "x", ".md"),
+    ]
+
+
+def test_create_tables_of_contents_nested(config, nested_notes):
+    toc = create_tables_of_contents(config, find_markdown(str(nested_notes)))
+    assert toc["Notes/A/B"] == ["x"] and toc["Notes/B"] == ["x"]
+    # folders without pages still exist so their subfolders have a parent
+    assert toc["Notes"] == [] and toc["Notes/A"] == []
+    assert create_folder_index(toc)["Notes"] == ["Notes/A", "Notes/B"]
+
+
+def test_get_route_name_nested(config):
+    site = SiteConfig(config)
+    assert get_route_name(site, "Notes/A/B") == "B"
+    assert get_route_name(site, "Notes/A/B/x") == "x"
+
+
+def test_site_config_is_frozen(config):
+    config = {**config, "general": {**config["general"], "pretty-urls": True}}
+    site = SiteConfig(config)
+    assert site.pretty_urls and site.url_suffix == "" and site.index_filename == ""
+    assert page_url(site, "Fruits", "index") == "/Fruits/"
+    with pytest.raises(AttributeError):
+        site.title = "Changed"
+    with pytest.raises(AttributeError):
+        site.typo = True
+
+
+def test_load_config_file_rejects_unknown_keys(tmp_path):
+    (tmp_path / "config.json").write_text(
+        '{"general": {"titel": "x", "nav-mode": "inlne"},'
+        ' "folders": {"A": {"sort-mode": "random"}}}'
+    )
+    with pytest.raises(ValueError) as e:
+        load_config_file(tmp_path / "config.json")
+    assert "unknown key `general.titel`" in str(e.value)
+    assert "`general.nav-mode` must be one of" in str(e.value)
+    assert "`folders.A.sort-mode` must be one of" in str(e.value)
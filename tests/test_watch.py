@@ -0,0 +1,145 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import json
+import os
+import shutil
+import pytest
+from mash.watch import *
+from mash.util import load_config_file, get_theme_path
+
+
+@pytest.fixture
+def site(tmp_path):
+    shutil.copytree("notes", tmp_path / "notes")
+    infile = str(tmp_path / "notes")
+    outfile = str(tmp_path / "out")
+    os.makedirs(outfile)
+    config = load_config_file(f"{infile}/config.json")
+    site = Site(
+        config,
+        f"{infile}/config.json",
+        infile,
+        outfile,
+        get_theme_path(config["general"]["theme"]),
+        [],
+    )
+    site.build()
+    return site
+
+
+def test_site_update_renders_edited_page_only(site):
+    os.utime(f"{site.outfile}/Example Page.html", (0, 0))
+    with open(f"{site.infile}/Session Recaps/Session 1.md", "a") as fp:
+        fp.write("\nan edit")
+    site.update({f"{site.infile}/Session Recaps/Session 1.md"})
+    assert os.path.getmtime(f"{site.outfile}/Example Page.html") == 0
+    with open(f"{site.outfile}/Session Recaps/Session 1.html") as fp:
+        assert "an edit" in fp.read()
+
+
+def test_site_update_new_page_changes_nav(site):
+    with open(f"{site.infile}/Session Recaps/Session 12.md", "w") as fp:
+        fp.write("new session")
+    site.update({f"{site.infile}/Session Recaps/Session 12.md"})
+    with open(f"{site.outfile}/Example Page.html") as fp:
+        assert "Session%2012" in fp.read()
+
+
+def test_site_update_new_link_updates_backlinks(site):
+    site.config["general"]["backlinks"] = True
+    site.build()
+    with open(f"{site.infile}/Example Page.md", "a") as fp:
+        fp.write("\n[[Session 1]]")
+    site.update({f"{site.infile}/Example Page.md"})
+    with open(f"{site.outfile}/Example Page.html") as fp:
+        assert "Session%201.html" in fp.read()
+    with open(f"{site.outfile}/Session Recaps/Session 1.html") as fp:
+        assert "Linked from:" in fp.read()
+
+
+def test_site_reload_config_rejects_invalid_nav_mode(site):
+    with open(site.config_path) as fp:
+        config = json.load(fp)
+    config["general"]["nav-mode"] = "inlne"
+    with open(site.config_path, "w") as fp:
+        json.dump(config, fp)
+    assert site.config_path in site.reload_config()
+    assert site.config["general"]["nav-mode"] == "inline"
+
+
+def test_site_update_folder_moved_out_of_notes(site, tmp_path):
+    watcher = create_watcher(site.watched_paths())
+    try:
+        os.rename(f"{site.infile}/Session Recaps", tmp_path / "Session Recaps")
+        site.update(watcher.wait())
+    finally:
+        watcher.close()
+    assert not os.path.exists(f"{site.outfile}/Session Recaps/Session 1.html")
+    assert "Session Recaps/Session 1.md" not in site.manifest["pages"]
+    with open(f"{site.outfile}/Example Page.html") as fp:
+        assert "Session%20Recaps" not in fp.read()
+
+
+def test_polling_watcher(tmp_path):
+    watcher = PollingWatcher([str(tmp_path)], interval=0)
+    (tmp_path / "new.md").write_text("hello")
+    assert watcher.wait() == {str(tmp_path / "new.md")}
+
+
+def test_inotify_watcher(tmp_path):
+    try:
+        watcher = InotifyWatcher([str(tmp_path)])
+    except (OSError, AttributeError, TypeError):
+        pytest.skip("inotify is unavailable")
+    (tmp_path / "new.md").write_text("hello")
+    assert str(tmp_path / "new.md") in watcher.wait()
+    watcher.close()
+
+
+def test_site_refresh_updates_edited_page(site):
+    site.start_watching()
+    try:
+        with open(f"{site.infile}/Example Page.md", "a") as fp:
+            fp.write("\nanother edit")
+        if isinstance(site.watcher, PollingWatcher):
+            # mtimes might not change within the same tick
+            site.watcher.snapshot = {}
+        assert site.refresh() == {}
+        with open(f"{site.outfile}/Example Page.html") as fp:
+            assert "another edit" in fp.read()
+        os.utime(f"{site.outfile}/.mash-manifest.json", ns=(0, 0))
+        assert site.refresh() is None
+    finally:
+        site.stop_watching()
+
+
+def test_watch_sees_edits_during_first_build(site, monkeypatch):
+    build = site.build
+
+    def build_and_edit():
+        errors = build()
+        with open(f"{site.infile}/Example Page.md", "a") as fp:
+            fp.write("\nan edit during the build")
+        return errors
+
+    def update(changed):
+        assert f"{site.infile}/Example Page.md" in changed
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(site, "build", build_and_edit)
+    monkeypatch.setattr(site, "update", update)
+    assert watch(site) == 0
@@ -0,0 +1,168 @@
+"""
+Copyright (C) 2026 Brianna Rainey
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import copy
+import os
+import pytest
+from mash.manifest import load_manifest
+from concurrent.futures import ProcessPoolExecutor
+from mash.worker import convert_pages, iter_convert_pages, work
+from mash.util import default_config, add_folder_config_defaults, load_config_file
+
+
+@pytest.fixture
+def config():
+    return copy.deepcopy(default_config)
+
+
+@pytest.fixture
+def toc():
+    return {"": ["Example Page"], "Fruits": ["Apple", "Orange"]}
+
+
+@pytest.fixture
+def pages():
+    return [
+        ("Example Page", "", ".md", "# hello"),
+        ("Apple", "Fruits", ".md", "an [[Orange]]"),
+        ("Orange", "Fruits", ".md", "*orange*"),
+        ("Kale", "Veggies", ".md", "not in the toc"),
+    ]
+
+
+def test_convert_pages_reports_errors_per_file(config, toc, pages):
+    add_folder_config_defaults(config, toc)
+    results = convert_pages(config, toc, pages)
+    assert [error is None for _, error in results] == [True, True, True, False]
+    assert results[3][1].startswith("KeyError")
+
+
+def test_convert_pages_parallel_matches_serial(config, toc, pages):
+    add_folder_config_defaults(config, toc)
+    assert convert_pages(config, toc, pages, jobs=2) == convert_pages(
+        config, toc, pages
+    )
+
+
+def test_iter_convert_pages_renders_few_chunks_ahead(config, toc, monkeypatch):
+    add_folder_config_defaults(config, toc)
+    submitted = []
+    submit = ProcessPoolExecutor.submit
+    monkeypatch.setattr(
+        ProcessPoolExecutor,
+        "submit",
+        lambda pool, *args: submitted.append(args) or submit(pool, *args),
+    )
+    pages = [("Apple", "Fruits", ".md", "apple")] * 40
+    results = iter_convert_pages(config, toc, pages, jobs=2)
+    next(results)
+    # 8 chunks of 5 pages, at most 4 of them submitted at a time
+    assert len(submitted) == 4
+    assert len(list(results)) == 39
+    assert len(submitted) == 8
+
+
+def test_iter_convert_pages_reads_chunks_as_they_are_converted(config, toc):
+    add_folder_config_defaults(config, toc)
+    read = []
+
+    def read_chunk(chunk):
+        read.extend(chunk)
+        return [(filename, dir, ext, "apple") for filename, dir, ext in chunk]
+
+    pages = [("Apple", "Fruits", ".md")] * 100
+    results = iter_convert_pages(config, toc, pages, read=read_chunk)
+    next(results)
+    assert len(read) == 64
+    assert len(list(results)) == 99
+    assert len(read) == 100
+
+
+def build_notes(outfile, **jobs):
+    config = load_config_file("notes/config.json")
+    errors = work(config, "notes", str(outfile), **jobs)
+    pages = {}
+    for dir, _, files in os.walk(outfile):
+        for filename in files:
+            if filename.endswith(".html"):
+                with open(os.path.join(dir, filename)) as f:
+                    pages[os.path.relpath(os.path.join(dir, filename), outfile)] = (
+                        f.read()
+                    )
+    return errors, pages
+
+
+def test_pipelined_build_matches_sequential(tmp_path):
+    assert build_notes(tmp_path / "a") == build_notes(
+        tmp_path / "b", jobs=2, read_jobs=3, write_jobs=2
+    )
+
+
+def test_pipelined_build_reports_write_errors(tmp_path):
+    # a directory in the way of a page makes writing it fail
+    os.makedirs(tmp_path / "Example Page.html")
+    errors, _ = build_notes(tmp_path, write_jobs=2)
+    assert list(errors) == ["/Example Page.md"]
+    assert errors["/Example Page.md"].startswith("IsADirectoryError")
+
+
+def test_identical_pages_are_not_rewritten(tmp_path, capsys):
+    config = load_config_file("notes/config.json")
+    work(config, "notes", str(tmp_path))
+    mtime = os.stat(tmp_path / "Example Page.html").st_mtime_ns
+    os.utime(tmp_path / "Example Page.html", ns=(0, 0))
+    # a route name for a page which doesn't exist changes the config, but not the pages
+    config["general"]["route-names"]["Nowhere"] = "nowhere"
+    capsys.readouterr()
+    work(config, "notes", str(tmp_path), load_manifest(str(tmp_path)))
+    assert "wrote 0 files, left 9 identical files untouched" in capsys.readouterr().out
+    assert os.stat(tmp_path / "Example Page.html").st_mtime_ns == 0
+    assert mtime != 0
+
+
+def test_paginated_index_pages_are_written_and_removed(tmp_path):
+    notes = tmp_path / "notes"
+    os.makedirs(notes / "Fruits")
+    (notes / "index.md").write_text("home")
+    (notes / "Fruits" / "index.md").write_text("fruits")
+    for fruit in ("Apple", "Banana", "Cherry", "Date", "Elderberry"):
+        (notes / "Fruits" / f"{fruit}.md").write_text(fruit)
+    config = copy.deepcopy(default_config)
+    config["folders"]["Fruits"] = {"page-size": 2}
+    work(config, str(notes), str(tmp_path / "out"))
+    assert os.path.exists(tmp_path / "out" / "Fruits" / "index-3.html")
+    os.remove(notes / "Fruits" / "Elderberry.md")
+    os.remove(notes / "Fruits" / "Date.md")
+    work(
+        config, str(notes), str(tmp_path / "out"), load_manifest(str(tmp_path / "out"))
+    )
+    assert os.path.exists(tmp_path / "out" / "Fruits" / "index-2.html")
+    assert not os.path.exists(tmp_path / "out" / "Fruits" / "index-3.html")
+    assert load_manifest(str(tmp_path / "out"))["index pages"] == {"Fruits/index.md": 2}
+
+
+def test_paginated_index_pages_never_overwrite_notes(tmp_path):
+    notes = tmp_path / "notes"
+    os.makedirs(notes / "Fruits")
+    (notes / "Fruits" / "index.md").write_text("fruits")
+    for fruit in ("Apple", "Banana", "index-2"):
+        (notes / "Fruits" / f"{fruit}.md").write_text(fruit)
+    config = copy.deepcopy(default_config)
+    config["folders"]["Fruits"] = {"page-size": 1}
+    errors = work(config, str(notes), str(tmp_path / "out"))
+    assert "index-2" in errors["Fruits/index.md"]
+    assert "index-2" in (tmp_path / "out" / "Fruits" / "index-2.html").read_text()
+    assert os.path.exists(tmp_path / "out" / "Fruits" / "index-3.html")